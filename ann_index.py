@@ -0,0 +1,164 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Clients with fewer questions are scored by brute force, which is exact and already fast
+ANN_MIN_QUESTIONS = int(os.getenv("ANN_MIN_QUESTIONS", 2000))
+# auto picks HNSW when hnswlib is installed and the NumPy IVF index otherwise; off disables ANN
+ANN_BACKEND = os.getenv("ANN_BACKEND", "auto")
+HNSW_M = int(os.getenv("ANN_HNSW_M", 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv("ANN_HNSW_EF_CONSTRUCTION", 200))
+HNSW_EF_SEARCH = int(os.getenv("ANN_HNSW_EF_SEARCH", 64))
+IVF_NPROBE = int(os.getenv("ANN_IVF_NPROBE", 8))
+IVF_TRAIN_SAMPLE = int(os.getenv("ANN_IVF_TRAIN_SAMPLE", 20000))
+
+
+class HnswIndex:
+    """hnswlib graph over unit vectors; inner product equals cosine similarity"""
+
+    name = "hnsw"
+
+    def __init__(self, rows, vectors):
+        self._index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        self._index.init_index(
+            max_elements=max(2 * len(rows), 1024),
+            ef_construction=HNSW_EF_CONSTRUCTION,
+            M=HNSW_M,
+            allow_replace_deleted=True
+        )
+        self._index.add_items(vectors, np.asarray(rows, dtype=np.int64))
+        self._index.set_ef(HNSW_EF_SEARCH)
+        self._rows = set(int(row) for row in rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def full(self) -> bool:
+        # Resizing is not safe during concurrent searches, so a full index is rebuilt and swapped instead
+        return self._index.get_current_count() >= self._index.get_max_elements()
+
+    def add(self, row: int, vector):
+        """Insert a new row or replace the vector of an existing one"""
+        vector = np.asarray(vector, dtype=np.float32)[None, :]
+        if row in self._rows:
+            # Updates the node in place; with replace_deleted hnswlib would move the label into a vacant
+            # slot and leave the old node searchable under the same label
+            self._index.add_items(vector, [row])
+        else:
+            self._index.add_items(vector, [row], replace_deleted=True)
+            self._rows.add(row)
+
+    def remove(self, row: int):
+        if row in self._rows:
+            self._index.mark_deleted(row)
+            self._rows.discard(row)
+
+    def search(self, query, k: int):
+        """Return (rows, scores) of up to k nearest rows, best first"""
+        k = min(k, len(self._rows))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        labels, distances = self._index.knn_query(np.asarray(query, dtype=np.float32)[None, :], k=k)
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+
+class IvfIndex:
+    """Inverted-file index in pure NumPy: rows are bucketed by nearest k-means centroid and only
+    the nprobe closest buckets are scored per query"""
+
+    name = "ivf"
+
+    def __init__(self, rows, vectors, nlist: int = None, nprobe: int = None, iterations: int = 10):
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.nlist = nlist or max(1, int(np.sqrt(len(rows))))
+        self.nprobe = min(nprobe or IVF_NPROBE, self.nlist)
+        self.centroids = self._train(vectors, iterations)
+
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        # Each list is an immutable (rows, vectors) pair, replaced whole on update so readers never see half a change
+        self._lists = [(rows[assignment == c], vectors[assignment == c]) for c in range(self.nlist)]
+        self._where = {int(row): int(c) for row, c in zip(rows, assignment)}
+
+    def _train(self, vectors, iterations):
+        """Spherical k-means on a sample of the vectors"""
+        rng = np.random.default_rng(0)
+        sample = vectors
+        if len(vectors) > IVF_TRAIN_SAMPLE:
+            sample = vectors[rng.choice(len(vectors), IVF_TRAIN_SAMPLE, replace=False)]
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            # Empty clusters keep their previous centroid
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        return centroids
+
+    def __len__(self):
+        return len(self._where)
+
+    @property
+    def full(self) -> bool:
+        return False
+
+    def add(self, row: int, vector):
+        """Insert a new row or replace the vector of an existing one"""
+        vector = np.asarray(vector, dtype=np.float32)
+        self.remove(row)
+        c = int(np.argmax(self.centroids @ vector))
+        rows, vectors = self._lists[c]
+        self._lists[c] = (np.append(rows, row), np.vstack([vectors, vector[None, :]]))
+        self._where[row] = c
+
+    def remove(self, row: int):
+        c = self._where.pop(row, None)
+        if c is None:
+            return
+        rows, vectors = self._lists[c]
+        keep = rows != row
+        self._lists[c] = (rows[keep], vectors[keep])
+
+    def search(self, query, k: int):
+        """Return (rows, scores) of up to k nearest rows among the probed lists, best first"""
+        query = np.asarray(query, dtype=np.float32)
+        centroid_scores = self.centroids @ query
+        if self.nprobe < self.nlist:
+            probe = np.argpartition(-centroid_scores, self.nprobe - 1)[:self.nprobe]
+        else:
+            probe = range(self.nlist)
+
+        lists = [self._lists[c] for c in probe]
+        rows = np.concatenate([rows for rows, _ in lists])
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.vstack([vectors for _, vectors in lists]) @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+
+def build_index(rows, vectors, backend: str = None):
+    """Build an ANN index over the given rows, or return None when brute force should be used"""
+    backend = backend or ANN_BACKEND
+    if backend == "off" or len(rows) < ANN_MIN_QUESTIONS:
+        return None
+    if backend == "hnsw" or (backend == "auto" and hnswlib is not None):
+        if hnswlib is None:
+            print("⚠️ ANN_BACKEND=hnsw but hnswlib is not installed, using the NumPy IVF index")
+        else:
+            return HnswIndex(rows, vectors)
+    return IvfIndex(rows, vectors)
@@ -0,0 +1,109 @@
+"""Recall@1 and latency of the ANN indexes against brute-force QuestionMatcher scoring.
+
+Run from the repository root (HNSW rows need `pip install hnswlib`):
+    python benchmarks/bench_ann.py
+    python benchmarks/bench_ann.py --sizes 5000 50000 --min-recall 0.95
+
+Vectors are clustered like topical FAQ entries, and queries are noisy copies of stored rows.
+Recall is measured on the freshly built index and again after incremental adds, edits and
+deletes through QuestionMatcher.upsert/remove. Exits non-zero if any recall is below --min-recall.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ann_index
+from matcher import QuestionMatcher
+
+DIMENSION = 384
+
+
+def unit(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def clustered_vectors(count, rng, topics=None):
+    topics = topics or max(8, count // 50)
+    centers = rng.standard_normal((topics, DIMENSION))
+    return unit(centers[rng.integers(0, topics, count)] + 0.6 * rng.standard_normal((count, DIMENSION)))
+
+
+def top_1(matcher, query):
+    candidates = matcher.top_k(query, 1)
+    return candidates[0].index if candidates else -1
+
+
+def recall_at_1(matcher, queries):
+    index, matcher.index = matcher.index, None
+    exact = [top_1(matcher, query) for query in queries]
+    matcher.index = index
+
+    started = time.perf_counter()
+    approximate = [top_1(matcher, query) for query in queries]
+    elapsed = time.perf_counter() - started
+    return np.mean(np.array(exact) == np.array(approximate)), elapsed / len(queries) * 1e6
+
+
+def brute_force_us(matcher, queries):
+    index, matcher.index = matcher.index, None
+    started = time.perf_counter()
+    for query in queries:
+        matcher.top_k(query, 1)
+    matcher.index = index
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[2000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    args = parser.parse_args()
+
+    backends = ["ivf"] + (["hnsw"] if ann_index.hnswlib is not None else [])
+    ann_index.ANN_MIN_QUESTIONS = 0
+    rng = np.random.default_rng(42)
+    failed = False
+
+    print(f"{'questions':>10} {'index':>6} {'build (s)':>10} {'brute (us)':>11} {'ann (us)':>9} "
+          f"{'recall@1':>9} {'after updates':>14}")
+
+    for size in args.sizes:
+        embeddings = clustered_vectors(size, rng)
+        ids = [str(i) for i in range(size)]
+        picks = rng.integers(0, size, args.queries)
+        queries = unit(embeddings[picks] + 0.03 * rng.standard_normal((args.queries, DIMENSION)))
+
+        for backend in backends:
+            ann_index.ANN_BACKEND = backend
+            started = time.perf_counter()
+            matcher = QuestionMatcher(ids, ids, ids, embeddings)
+            build_seconds = time.perf_counter() - started
+
+            brute_us = brute_force_us(matcher, queries)
+            recall, ann_us = recall_at_1(matcher, queries)
+
+            # Incremental changes: 10% new questions, 5% edited, 5% deleted
+            for i in range(size // 10):
+                matcher.upsert(f"new-{i}", "", "", clustered_vectors(1, rng)[0])
+            for question_id in rng.choice(size, size // 20, replace=False):
+                matcher.upsert(str(question_id), "", "", clustered_vectors(1, rng)[0])
+            for question_id in rng.choice(size, size // 20, replace=False):
+                matcher.remove(str(question_id))
+            updated_recall, _ = recall_at_1(matcher, queries)
+
+            failed |= min(recall, updated_recall) < args.min_recall
+            print(f"{size:>10} {backend:>6} {build_seconds:>10.2f} {brute_us:>11.1f} {ann_us:>9.1f} "
+                  f"{recall:>9.3f} {updated_recall:>14.3f}")
+
+    if failed:
+        print(f"❌ Recall@1 below {args.min_recall}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare embedding backends on encode latency and on accuracy against the torch baseline.
+
+The ONNX backends need `pip install optimum[onnxruntime]`. Run from the repository root:
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --backends torch onnx-int8
+
+Accuracy uses the fixture FAQ set: every paraphrase is matched against the FAQ questions,
+and each backend's top-1 answer is compared with the torch one. Similarity drift is the
+difference between a backend's cosine scores and torch's for the same question/paraphrase pairs.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_backends import BACKENDS, load_backend
+from question_cache import EMBEDDING_MODEL
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "faq.json")
+
+
+def time_encode(backend, texts, repeats):
+    backend.encode(texts)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        backend.encode(texts)
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        faq = json.load(f)
+    questions = [entry["question"] for entry in faq]
+    queries = [paraphrase for entry in faq for paraphrase in entry["paraphrases"]]
+    expected = np.array([index for index, entry in enumerate(faq) for _ in entry["paraphrases"]])
+
+    baseline_scores = None
+    print(f"{'backend':>10} {'load (s)':>9} {'1 query (ms)':>13} {'32 batch (ms)':>14} "
+          f"{'top-1 acc':>10} {'agree w/ torch':>15} {'mean drift':>11} {'max drift':>10}")
+
+    for name in ["torch"] + [b for b in args.backends if b != "torch"]:
+        started = time.perf_counter()
+        backend = load_backend(args.model, name)
+        load_seconds = time.perf_counter() - started
+
+        single_ms = time_encode(backend, queries[:1], args.repeats)
+        batch_ms = time_encode(backend, (queries * 32)[:32], max(1, args.repeats // 5))
+
+        scores = backend.encode(queries) @ backend.encode(questions).T
+        top1 = scores.argmax(axis=1)
+        if baseline_scores is None:
+            baseline_scores, baseline_top1 = scores, top1
+        drift = np.abs(scores - baseline_scores)
+
+        if name in args.backends:
+            print(f"{name:>10} {load_seconds:>9.2f} {single_ms:>13.2f} {batch_ms:>14.2f} "
+                  f"{(top1 == expected).mean():>10.1%} {(top1 == baseline_top1).mean():>15.1%} "
+                  f"{drift.mean():>11.4f} {drift.max():>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Concurrent load test for the visitor query and notification polling endpoints.
+
+Start the API (uvicorn main:app) and run from the repository root:
+    pip install httpx
+    python benchmarks/bench_load.py --website example.com --token <client access token>
+
+Compare the requests/second and latency percentiles before and after a change,
+for example by checking out the previous commit and running the same command.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+
+async def run_endpoint(client, method, url, concurrency, total, **kwargs):
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--website", required=True, help="Website of an active client with questions")
+    parser.add_argument("--question", default="What are your timings?")
+    parser.add_argument("--token", required=True, help="Bearer token used for /notifications/unread-count")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        query = await run_endpoint(
+            client, "POST", "/speechbot/query", args.concurrency, args.requests,
+            json={"website": args.website, "question": args.question, "language": "en"}
+        )
+        print(f"/speechbot/query              {query}")
+
+        unread = await run_endpoint(
+            client, "GET", "/notifications/unread-count", args.concurrency, args.requests,
+            headers={"Authorization": f"Bearer {args.token}"}
+        )
+        print(f"/notifications/unread-count   {unread}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""/speechbot/query latency with and without a concurrent /login flood.
+
+Start the API (uvicorn main:app) and run from the repository root:
+    pip install httpx
+    python benchmarks/bench_login_flood.py --website example.com --email client@example.com --password secret
+
+The query endpoint is measured alone, then again while --login-concurrency workers log in
+continuously. With bcrypt on the auth-hash pool (AUTH_HASH_WORKERS) the query p99 should stay
+close to the baseline; exits non-zero if it grows by more than --max-p99-ratio.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import httpx
+
+from bench_load import run_endpoint
+
+
+async def login_flood(client, email, password, concurrency, stop):
+    logins = 0
+    errors = 0
+
+    async def worker():
+        nonlocal logins, errors
+        while not stop.is_set():
+            try:
+                response = await client.post("/login", json={"email": email, "password": password})
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            logins += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {"logins": logins, "errors": errors, "logins_per_second": round(logins / elapsed, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--website", required=True, help="Website of an active client with questions")
+    parser.add_argument("--question", default="What are your timings?")
+    parser.add_argument("--email", required=True, help="Credentials used for the login flood")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent visitor queries")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--max-p99-ratio", type=float, default=2.0)
+    args = parser.parse_args()
+
+    query_kwargs = {"json": {"website": args.website, "question": args.question, "language": "en"}}
+    connections = args.concurrency + args.login_concurrency
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        baseline = await run_endpoint(
+            client, "POST", "/speechbot/query", args.concurrency, args.requests, **query_kwargs
+        )
+        print(f"query alone          {baseline}")
+
+        stop = asyncio.Event()
+        flood = asyncio.ensure_future(login_flood(client, args.email, args.password, args.login_concurrency, stop))
+        # Let the flood saturate the hash pool before measuring
+        await asyncio.sleep(1)
+        flooded = await run_endpoint(
+            client, "POST", "/speechbot/query", args.concurrency, args.requests, **query_kwargs
+        )
+        stop.set()
+        logins = await flood
+        print(f"query during flood   {flooded}")
+        print(f"login flood          {logins}")
+
+    ratio = flooded["p99_ms"] / baseline["p99_ms"] if baseline["p99_ms"] else 0
+    print(f"p99 ratio            {ratio:.2f} (max {args.max_p99_ratio})")
+    return 0 if ratio <= args.max_p99_ratio else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,56 @@
+"""Compare QuestionMatcher scoring with the previous torch cos_sim path.
+
+Run from the repository root:
+    python benchmarks/bench_matcher.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+import torch
+from sentence_transformers import util
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matcher import QuestionMatcher
+
+DIMENSION = 384
+SIZES = [5, 150, 5000]
+REPEATS = 2000
+
+
+def random_unit_vectors(count, rng):
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'questions':>10} {'torch cos_sim (us)':>20} {'matcher top-3 (us)':>20} {'speedup':>8}")
+
+    for size in SIZES:
+        embeddings = random_unit_vectors(size, rng)
+        query = random_unit_vectors(1, rng)
+        matcher = QuestionMatcher([str(i) for i in range(size)], [""] * size, [""] * size, embeddings)
+
+        # Previous path: tensors from model.encode, cos_sim, argmax
+        torch_embeddings = torch.from_numpy(embeddings)
+        torch_query = torch.from_numpy(query)
+
+        def torch_path():
+            similarities = util.cos_sim(torch_query, torch_embeddings)[0]
+            best = similarities.argmax().item()
+            return similarities[best].item()
+
+        def matcher_path():
+            return matcher.match(query[0])
+
+        assert matcher_path().best.index == int(util.cos_sim(torch_query, torch_embeddings)[0].argmax())
+
+        torch_time = min(timeit.repeat(torch_path, number=REPEATS, repeat=3)) / REPEATS * 1e6
+        matcher_time = min(timeit.repeat(matcher_path, number=REPEATS, repeat=3)) / REPEATS * 1e6
+        print(f"{size:>10} {torch_time:>20.1f} {matcher_time:>20.1f} {torch_time / matcher_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import threading
+from dotenv import load_dotenv
+from cache import TTLCache
+from database import db
+
+load_dotenv()
+
+# Only what /speechbot/query needs; never password hashes, PAN or TAN
+CLIENT_DIRECTORY_PROJECTION = {
+    "website": 1,
+    "subscription_end": 1,
+    "user_hits_used": 1,
+    "user_hits_allowed": 1,
+    "is_active": 1,
+    "match_threshold": 1,
+    "suggestion_threshold": 1,
+    "match_min_margin": 1,
+    "questions_version": 1
+}
+
+# Written on every served hit or reminder run; record_hit keeps the cached counters current instead
+COUNTER_FIELDS = {"user_hits_used", "user_hits_reserved"}
+COUNTER_FIELD_PREFIXES = ("expiry_reminder_",)
+
+_NOT_FOUND = object()
+
+
+def only_counters_changed(change: dict) -> bool:
+    """True for an update that touched nothing but usage counters and reminder bookkeeping"""
+    description = change.get("updateDescription")
+    if change["operationType"] != "update" or not description:
+        return False
+    fields = list(description.get("updatedFields", {})) + list(description.get("removedFields", []))
+    return bool(fields) and all(
+        field.split(".")[0] in COUNTER_FIELDS or field.startswith(COUNTER_FIELD_PREFIXES) for field in fields
+    )
+
+
+class ClientDirectory:
+    """Process-local map of website to a slim client record for the query hot path"""
+
+    def __init__(self, ttl: float = None, maxsize: int = None, negative_ttl: float = None):
+        self.ttl = ttl or float(os.getenv("CLIENT_DIRECTORY_TTL", 30))
+        self.negative_ttl = negative_ttl or float(os.getenv("CLIENT_DIRECTORY_NEGATIVE_TTL", 10))
+        self._cache = TTLCache(
+            maxsize=maxsize or int(os.getenv("CLIENT_DIRECTORY_SIZE", 10000)),
+            ttl=self.ttl
+        )
+        self._watcher = None
+
+    async def get(self, website: str):
+        """Return the slim client record for a website, or None if no client owns it"""
+        entry = self._cache.get(website)
+        if entry is _NOT_FOUND:
+            return None
+        if entry is not None:
+            return entry
+
+        client = await db.get_async_collection("clients").find_one({"website": website}, CLIENT_DIRECTORY_PROJECTION)
+        if client is None:
+            # Remember unknown websites briefly so stray widget traffic does not hit MongoDB every time
+            self._cache.set(website, _NOT_FOUND, ttl=self.negative_ttl)
+            return None
+
+        self._cache.set(website, client, tag=str(client["_id"]))
+        return client
+
+    def record_hit(self, client: dict):
+        """Keep the cached usage counter in step with a user hit written to MongoDB"""
+        client["user_hits_used"] = client.get("user_hits_used", 0) + 1
+
+    def invalidate(self, client_id: str):
+        self._cache.invalidate_tag(str(client_id))
+
+    def invalidate_website(self, website: str):
+        if website:
+            self._cache.pop(website)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "change_stream": self._watcher is not None and self._watcher.is_alive()}
+
+    def start_change_stream(self):
+        """Invalidate entries as clients change, when MongoDB supports change streams"""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="client-directory-watch", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        try:
+            with db.get_collection("clients").watch(
+                [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+            ) as stream:
+                for change in stream:
+                    # Otherwise every query on any worker would evict the client everywhere
+                    if not only_counters_changed(change):
+                        self.invalidate(change["documentKey"]["_id"])
+        except Exception as e:
+            print(f"⚠️ Client directory change stream stopped, relying on TTL: {e}")
+
+
+client_directory = ClientDirectory()
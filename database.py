@@ -1,26 +1,144 @@
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
+from pymongo.monitoring import ConnectionPoolListener
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import threading
+import time
+from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Bump when create_indexes or migrate_existing_data changes, then run `python manage.py migrate`
+SCHEMA_VERSION = 4
+
+def get_client_options():
+    """Pool, timeout and compression settings shared by the sync and async MongoDB clients"""
+    options = {
+        "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", 0)),
+        "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", 100)),
+        "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 300000)),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 30000)),
+        "connectTimeoutMS": int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", 20000))
+    }
+    if os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS"):
+        options["waitQueueTimeoutMS"] = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS"))
+    if os.getenv("MONGODB_SOCKET_TIMEOUT_MS"):
+        options["socketTimeoutMS"] = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS"))
+    # e.g. "zstd,snappy,zlib"; zstd needs the zstandard package and snappy needs python-snappy
+    if os.getenv("MONGODB_COMPRESSORS"):
+        options["compressors"] = os.getenv("MONGODB_COMPRESSORS")
+    return options
+
+class PoolStatsListener(ConnectionPoolListener):
+    """Tracks connection pool utilization and checkout wait times for one client"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.connections_open = 0
+        self.connections_in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.pool_clears = 0
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        wait_ms = self._wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.connections_in_use += 1
+            self.max_in_use = max(self.max_in_use, self.connections_in_use)
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+    
+    def connection_check_out_failed(self, event):
+        wait_ms = self._wait_ms()
+        with self._lock:
+            self.checkout_failures += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.connections_in_use = max(0, self.connections_in_use - 1)
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open = max(0, self.connections_open - 1)
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def _wait_ms(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_in_use": self.connections_in_use,
+                "max_connections_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "average_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "pool_clears": self.pool_clears
+            }
+
 class Database:
     def __init__(self):
         self.client = None
         self.db = None
+        self.async_client = None
+        self.async_db = None
+        self.sync_pool_stats = PoolStatsListener()
+        self.async_pool_stats = PoolStatsListener()
+        # Dashboards tolerate slightly stale data, so their reads can go to secondaries
+        self.read_only_preference = make_read_preference(
+            read_pref_mode_from_name(os.getenv("MONGODB_DASHBOARD_READ_PREFERENCE", "secondaryPreferred")),
+            None
+        )
         self.connect()
     
     def connect(self):
         try:
-            mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/speechbot_saas")
-            self.client = MongoClient(mongodb_uri)
+            self.mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/speechbot_saas")
+            # Sync client for startup, maintenance and background threads
+            self.client = MongoClient(
+                self.mongodb_uri,
+                event_listeners=[self.sync_pool_stats],
+                **get_client_options()
+            )
             self.db = self.client.speechbot_saas
             print("Connected to MongoDB successfully")
             
-            # Initialize database collections and indexes
-            self.init_database()
-            
         except ConnectionFailure as e:
             print(f"Could not connect to MongoDB: {e}")
     
@@ -44,6 +162,35 @@ class Database:
         
         print("🎉 Database initialization completed!")
     
+    def get_schema_version(self):
+        """Schema version recorded by the last migration, or 0 if none has run"""
+        meta = self.db.schema_meta.find_one({"_id": "schema"})
+        return meta.get("version", 0) if meta else 0
+    
+    def migrate(self):
+        """Create collections and indexes, migrate data and record the schema version"""
+        self.init_database()
+        self.db.schema_meta.update_one(
+            {"_id": "schema"},
+            {"$set": {"version": SCHEMA_VERSION, "migrated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"✅ Schema version {SCHEMA_VERSION} recorded")
+    
+    def check_schema_version(self):
+        """Cheap startup check that migrations have been applied; never migrates by itself"""
+        try:
+            version = self.get_schema_version()
+        except Exception as e:
+            print(f"⚠️ Could not read schema version: {e}")
+            return False
+        
+        if version < SCHEMA_VERSION:
+            print(f"⚠️ Database schema version {version} is behind {SCHEMA_VERSION}, run `python manage.py migrate`")
+            return False
+        print(f"✅ Database schema version {version}")
+        return True
+    
     def create_indexes(self):
         """Create necessary indexes for better performance"""
         try:
@@ -68,12 +215,19 @@ class Database:
             self.db.clients.create_index([("website", 1)])
             self.db.clients.create_index([("email", 1)])
             self.db.clients.create_index([("subscription_plan", 1)])
+            self.db.clients.create_index([("subscription_end", 1)])
             
             # Notifications indexes
             self.db.notifications.create_index([("user_id", 1), ("is_read", 1)])
             self.db.notifications.create_index([("created_at", -1)])
             self.db.notifications.create_index([("type", 1)])
             
+            # Learned visitor phrasings, loaded per client when its matcher is built
+            self.db.question_aliases.create_index([("client_id", 1)])
+            
+            # Email outbox index, for the worker claiming the next due message
+            self.db.email_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+            
             print("✅ Database indexes created successfully")
             
         except Exception as e:
@@ -82,24 +236,20 @@ class Database:
     def migrate_existing_data(self):
         """Migrate existing data to new schema if needed"""
         try:
-            # Check if we need to add user_hits fields to existing clients
-            clients = self.db.clients.find({"user_hits_allowed": {"$exists": False}})
+            # Add user_hits fields to existing clients, one update_many per plan
+            plan_hits = {
+                "monthly": 100,
+                "quarterly": 400,
+                "yearly": 1200
+            }
+            plan_filters = [({"subscription_plan": plan}, hits) for plan, hits in plan_hits.items()]
+            # Missing or unknown plans get the trial limit
+            plan_filters.append(({"subscription_plan": {"$nin": list(plan_hits)}}, 50))
             
             count = 0
-            for client in clients:
-                # Set default values for existing clients
-                plan_limits = {
-                    "trial": {"user_hits_allowed": 50},
-                    "monthly": {"user_hits_allowed": 100},
-                    "quarterly": {"user_hits_allowed": 400},
-                    "yearly": {"user_hits_allowed": 1200}
-                }
-                
-                current_plan = client.get("subscription_plan", "trial")
-                user_hits_allowed = plan_limits.get(current_plan, plan_limits["trial"])["user_hits_allowed"]
-                
-                self.db.clients.update_one(
-                    {"_id": client["_id"]},
+            for plan_filter, user_hits_allowed in plan_filters:
+                result = self.db.clients.update_many(
+                    {**plan_filter, "user_hits_allowed": {"$exists": False}},
                     {
                         "$set": {
                             "user_hits_allowed": user_hits_allowed,
@@ -107,7 +257,7 @@ class Database:
                         }
                     }
                 )
-                count += 1
+                count += result.modified_count
             
             if count > 0:
                 print(f"✅ Migrated {count} clients with user hits data")
@@ -115,8 +265,34 @@ class Database:
         except Exception as e:
             print(f"❌ Error during data migration: {e}")
     
-    def get_collection(self, collection_name):
+    def get_collection(self, collection_name, read_only=False):
+        if read_only:
+            return self.db.get_collection(collection_name, read_preference=self.read_only_preference)
         return self.db[collection_name]
     
+    def get_async_collection(self, collection_name, read_only=False):
+        """Motor collection for request handlers, so database I/O does not block the event loop"""
+        if self.async_db is None:
+            # Created lazily so the client binds to the server's running event loop
+            self.async_client = AsyncIOMotorClient(
+                self.mongodb_uri,
+                event_listeners=[self.async_pool_stats],
+                **get_client_options()
+            )
+            self.async_db = self.async_client.speechbot_saas
+        if read_only:
+            return self.async_db.get_collection(collection_name, read_preference=self.read_only_preference)
+        return self.async_db[collection_name]
+    
+    def pool_stats(self):
+        """Connection pool utilization for sizing the pools under load"""
+        options = get_client_options()
+        return {
+            "max_pool_size": options["maxPoolSize"],
+            "min_pool_size": options["minPoolSize"],
+            "sync": self.sync_pool_stats.stats(),
+            "async": self.async_pool_stats.stats()
+        }
+    
 
 db = Database()
\ No newline at end of file
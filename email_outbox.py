@@ -0,0 +1,184 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from database import db
+from email_service import email_service
+
+load_dotenv()
+
+
+class EmailOutbox:
+    """MongoDB-backed queue of outgoing mail, drained by one background worker over a persistent SMTP connection"""
+
+    def __init__(self, poll_interval: float = None, max_attempts: int = None, retry_base: float = None):
+        self.poll_interval = poll_interval or float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", 5))
+        self.max_attempts = max_attempts or int(os.getenv("EMAIL_MAX_ATTEMPTS", 6))
+        self.retry_base = retry_base or float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+        self.retry_max = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", 3600))
+        # A message left in "sending" this long is assumed to belong to a crashed worker and is retried
+        self.lease = timedelta(seconds=float(os.getenv("EMAIL_SEND_LEASE_SECONDS", 300)))
+        self._task = None
+        self._wakeup = None
+
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def enqueue(self, to_email: str, subject: str, body: str, is_html: bool = False, kind: str = None,
+                      text_body: str = None):
+        """Queue a message; the request path only pays for this insert"""
+        now = datetime.utcnow()
+        result = await db.get_async_collection("email_outbox").insert_one({
+            "to": to_email,
+            "subject": subject,
+            "body": body,
+            "is_html": is_html,
+            "text_body": text_body,
+            "kind": kind,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now
+        })
+        self.enqueued += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return str(result.inserted_id)
+
+    async def enqueue_rendered(self, to_email: str, rendered, kind: str = None):
+        """Queue a RenderedEmail from the template registry as multipart text and HTML"""
+        return await self.enqueue(
+            to_email, rendered.subject, rendered.html, is_html=True, kind=kind, text_body=rendered.text
+        )
+
+    async def _claim(self):
+        # Each claim counts as an attempt, so a message that takes its worker down with it is not retried forever
+        now = datetime.utcnow()
+        return await db.get_async_collection("email_outbox").find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {
+                    "status": "sending",
+                    "locked_at": {"$lt": now - self.lease},
+                    "attempts": {"$lt": self.max_attempts}
+                }
+            ]},
+            {"$set": {"status": "sending", "locked_at": now}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _fail_abandoned(self, outbox_collection):
+        """Give up on messages whose lease expired on their last allowed attempt"""
+        result = await outbox_collection.update_many(
+            {
+                "status": "sending",
+                "locked_at": {"$lt": datetime.utcnow() - self.lease},
+                "attempts": {"$gte": self.max_attempts}
+            },
+            {
+                "$set": {"status": "failed", "next_attempt_at": None, "last_error": "Lease expired while sending"},
+                "$unset": {"locked_at": ""}
+            }
+        )
+        if result.modified_count:
+            self.failed += result.modified_count
+            print(f"❌ Gave up on {result.modified_count} emails whose worker stopped while sending them")
+
+    async def drain(self) -> int:
+        """Send every message that is due, returning how many were delivered"""
+        outbox_collection = db.get_async_collection("email_outbox")
+        delivered = 0
+        await self._fail_abandoned(outbox_collection)
+        while True:
+            message = await self._claim()
+            if message is None:
+                return delivered
+
+            try:
+                mime_message = email_service.build_message(
+                    message["to"], message["subject"], message["body"], message.get("is_html", False),
+                    message.get("text_body")
+                )
+                # smtplib blocks, so delivery runs in a thread; the connection is reused between messages
+                await asyncio.to_thread(email_service.deliver, mime_message)
+            except Exception as e:
+                await self._reschedule(outbox_collection, message, e)
+                continue
+
+            await outbox_collection.update_one(
+                {"_id": message["_id"]},
+                {"$set": {"status": "sent", "sent_at": datetime.utcnow()}, "$unset": {"locked_at": ""}}
+            )
+            self.sent += 1
+            delivered += 1
+
+    async def _reschedule(self, outbox_collection, message, error):
+        # Already counted when the message was claimed
+        attempts = message.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = "failed", None
+            self.failed += 1
+            print(f"❌ Giving up on email to {message['to']} after {attempts} attempts: {error}")
+        else:
+            # Exponential backoff so a struggling SMTP server is not hammered
+            delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+            status, next_attempt_at = "pending", datetime.utcnow() + timedelta(seconds=delay)
+            self.retried += 1
+            print(f"⚠️ Email to {message['to']} failed, retrying in {delay:.0f}s: {error}")
+
+        await outbox_collection.update_one(
+            {"_id": message["_id"]},
+            {
+                "$set": {
+                    "status": status,
+                    "attempts": attempts,
+                    "next_attempt_at": next_attempt_at,
+                    "last_error": str(error)
+                },
+                "$unset": {"locked_at": ""}
+            }
+        )
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f"❌ Error draining email outbox: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(email_service.close)
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "smtp_connects": email_service.connects,
+            "running": self._task is not None
+        }
+
+
+email_outbox = EmailOutbox()
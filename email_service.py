@@ -1,8 +1,11 @@
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 from dotenv import load_dotenv
+from email_templates import email_templates
 
 load_dotenv()
 
@@ -12,24 +15,86 @@ class EmailService:
         self.smtp_port = int(os.getenv("SMTP_PORT", 587))
         self.sender_email = os.getenv("SMTP_EMAIL")
         self.sender_password = os.getenv("SMTP_PASSWORD")
+        # A local debugging server (python -m aiosmtpd -n -l localhost:1025) needs SMTP_USE_TLS=false and no password
+        self.use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+        self.timeout = float(os.getenv("SMTP_TIMEOUT", 30))
+        # Idle connections are checked with NOOP before reuse, as servers drop them after a while
+        self.keepalive_check = float(os.getenv("SMTP_KEEPALIVE_CHECK", 60))
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        
+        self.connects = 0
+        self.delivered = 0
     
-    def send_email(self, to_email, subject, body, is_html=False):
+    def build_message(self, to_email, subject, body, is_html=False, text_body=None):
+        # With a text version, HTML mail is sent as multipart/alternative for clients that cannot render HTML
+        message = MIMEMultipart("alternative") if is_html and text_body else MIMEMultipart()
+        message["From"] = self.sender_email
+        message["To"] = to_email
+        message["Subject"] = subject
+        
+        if is_html:
+            if text_body:
+                message.attach(MIMEText(text_body, "plain"))
+            message.attach(MIMEText(body, "html"))
+        else:
+            message.attach(MIMEText(body, "plain"))
+        return message
+    
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.sender_password:
+            server.login(self.sender_email, self.sender_password)
+        self.connects += 1
+        return server
+    
+    def _get_connection(self):
+        if self._connection is not None and time.monotonic() - self._last_used > self.keepalive_check:
+            try:
+                if self._connection.noop()[0] != 250:
+                    self._disconnect()
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+    
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except Exception:
+                pass
+            self._connection = None
+    
+    def deliver(self, message):
+        """Send over the persistent authenticated connection, reconnecting once if it was dropped; raises on failure"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._get_connection().send_message(message)
+                    self._last_used = time.monotonic()
+                    self.delivered += 1
+                    return
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+                except smtplib.SMTPException:
+                    # The session may be in an unknown state, so start the next message on a fresh one
+                    self._disconnect()
+                    raise
+    
+    def close(self):
+        with self._lock:
+            self._disconnect()
+    
+    def send_email(self, to_email, subject, body, is_html=False, text_body=None):
         try:
-            message = MIMEMultipart()
-            message["From"] = self.sender_email
-            message["To"] = to_email
-            message["Subject"] = subject
-            
-            if is_html:
-                message.attach(MIMEText(body, "html"))
-            else:
-                message.attach(MIMEText(body, "plain"))
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(message)
-            
+            self.deliver(self.build_message(to_email, subject, body, is_html, text_body))
             print(f"Email sent successfully to {to_email}")
             return True
         except Exception as e:
@@ -38,89 +103,9 @@ class EmailService:
 
 email_service = EmailService()
 
-# Email templates
+# Email templates, kept as wrappers around the compiled registry
 def get_welcome_email_template(name, website):
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-            .content {{ background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; }}
-            .button {{ background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; display: inline-block; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Welcome to TVA-The Voice Assistant!</h1>
-            </div>
-            <div class="content">
-                <h2>Hello {name},</h2>
-                <p>Thank you for signing up with TVA! We're excited to have you on board.</p>
-                
-                <h3>Your Account Details:</h3>
-                <ul>
-                    <li><strong>Website:</strong> {website}</li>
-                    <li><strong>Plan:</strong> Free Trial (5 questions)</li>
-                    <li><strong>Trial Period:</strong> 2 days</li>
-                </ul>
-                
-                <h3>Next Steps:</h3>
-                <ol>
-                    <li>Add your questions and answers</li>
-                    <li>Copy the embed script to your website</li>
-                    <li>Test the TVA on your site</li>
-                </ol>
-                
-                <p>If you have any questions, feel free to reach out to our support team.</p>
-                
-                <a href="http://localhost:8000/login" class="button">Get Started</a>
-                
-                <p style="margin-top: 30px; font-size: 12px; color: #666;">
-                    Best regards,<br>
-                    The TVA Team
-                </p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    return email_templates.render("welcome", name=name, website=website).html
 
 def get_password_reset_email_template(name, otp):
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: #dc3545; color: white; padding: 20px; text-align: center; border-radius: 10px 10px 0 0; }}
-            .content {{ background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; }}
-            .otp {{ font-size: 32px; font-weight: bold; text-align: center; color: #dc3545; margin: 20px 0; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Password Reset Request</h1>
-            </div>
-            <div class="content">
-                <h2>Hello {name},</h2>
-                <p>You requested to reset your password. Use the OTP below to verify your identity:</p>
-                
-                <div class="otp">{otp}</div>
-                
-                <p>This OTP is valid for 10 minutes. If you didn't request this reset, please ignore this email.</p>
-                
-                <p style="margin-top: 30px; font-size: 12px; color: #666;">
-                    Best regards,<br>
-                    The TVA Team
-                </p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    return email_templates.render("password_reset", name=name, otp=otp).html
@@ -0,0 +1,206 @@
+from collections import namedtuple
+from html import escape
+from string import Template
+
+RenderedEmail = namedtuple("RenderedEmail", ["subject", "html", "text"])
+
+# Shared layout; $title, $header_style, $extra_style and $content are filled once per template at startup
+BASE_LAYOUT = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { $header_style color: white; text-align: center; border-radius: 10px 10px 0 0; }
+            .content { background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; }
+            $extra_style
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>$title</h1>
+            </div>
+            <div class="content">
+$content
+                <p style="margin-top: 30px; font-size: 12px; color: #666;">
+                    Best regards,<br>
+                    The TVA Team
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+TEXT_FOOTER = "\n\nBest regards,\nThe TVA Team\n"
+
+
+class CompiledTemplate:
+    """A string.Template split once into literal segments and slot names, so rendering is a single join"""
+
+    def __init__(self, source: str):
+        self.literals = [""]
+        self.slots = []
+        position = 0
+        for match in Template.pattern.finditer(source):
+            self.literals[-1] += source[position:match.start()]
+            position = match.end()
+            if match.group("escaped") is not None:
+                self.literals[-1] += "$"
+            elif match.group("named") or match.group("braced"):
+                self.slots.append(match.group("named") or match.group("braced"))
+                self.literals.append("")
+            else:
+                raise ValueError(f"Invalid placeholder in template at position {match.start()}")
+        self.literals[-1] += source[position:]
+
+    def render(self, values: dict) -> str:
+        parts = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            parts.append(values[slot])
+            parts.append(literal)
+        return "".join(parts)
+
+
+class EmailTemplate:
+    def __init__(self, name: str, subject: str, title: str, html_content: str, text_content: str,
+                 header_style: str, extra_style: str = ""):
+        self.name = name
+        # Layout, CSS and title are static, so they are substituted here and only recipient slots stay open
+        html = BASE_LAYOUT.safe_substitute(
+            title=title, header_style=header_style, extra_style=extra_style, content=html_content
+        )
+        self.subject = CompiledTemplate(subject)
+        self.html = CompiledTemplate(html)
+        self.text = CompiledTemplate(text_content + TEXT_FOOTER)
+        self.slots = set(self.subject.slots) | set(self.html.slots) | set(self.text.slots)
+
+    def render(self, context: dict) -> RenderedEmail:
+        missing = self.slots - context.keys()
+        if missing:
+            raise KeyError(f"Missing values for email template {self.name}: {', '.join(sorted(missing))}")
+        text_values = {key: str(value) for key, value in context.items()}
+        html_values = {key: escape(value) for key, value in text_values.items()}
+        return RenderedEmail(
+            self.subject.render(text_values),
+            self.html.render(html_values),
+            self.text.render(text_values)
+        )
+
+
+class TemplateRegistry:
+    def __init__(self):
+        self._templates = {}
+
+    def register(self, template: EmailTemplate):
+        self._templates[template.name] = template
+
+    def get(self, name: str) -> EmailTemplate:
+        return self._templates[name]
+
+    def render(self, template_name: str, /, **context) -> RenderedEmail:
+        # Positional-only, as templates commonly have a $name slot
+        return self._templates[template_name].render(context)
+
+    def render_many(self, template_name: str, contexts) -> list:
+        """Render one template for many recipients, e.g. admin broadcasts"""
+        template = self._templates[template_name]
+        return [template.render(context) for context in contexts]
+
+
+email_templates = TemplateRegistry()
+
+email_templates.register(EmailTemplate(
+    name="welcome",
+    subject="Welcome to TVA!",
+    title="Welcome to TVA-The Voice Assistant!",
+    header_style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px;",
+    extra_style=".button { background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; display: inline-block; }",
+    html_content="""
+                <h2>Hello $name,</h2>
+                <p>Thank you for signing up with TVA! We're excited to have you on board.</p>
+
+                <h3>Your Account Details:</h3>
+                <ul>
+                    <li><strong>Website:</strong> $website</li>
+                    <li><strong>Plan:</strong> Free Trial (5 questions)</li>
+                    <li><strong>Trial Period:</strong> 2 days</li>
+                </ul>
+
+                <h3>Next Steps:</h3>
+                <ol>
+                    <li>Add your questions and answers</li>
+                    <li>Copy the embed script to your website</li>
+                    <li>Test the TVA on your site</li>
+                </ol>
+
+                <p>If you have any questions, feel free to reach out to our support team.</p>
+
+                <a href="http://localhost:8000/login" class="button">Get Started</a>
+""",
+    text_content="""Hello $name,
+
+Thank you for signing up with TVA! We're excited to have you on board.
+
+Your Account Details:
+- Website: $website
+- Plan: Free Trial (5 questions)
+- Trial Period: 2 days
+
+Next Steps:
+1. Add your questions and answers
+2. Copy the embed script to your website
+3. Test the TVA on your site
+
+If you have any questions, feel free to reach out to our support team.
+
+Get Started: http://localhost:8000/login"""
+))
+
+email_templates.register(EmailTemplate(
+    name="password_reset",
+    subject="Password Reset OTP - SpeechBot",
+    title="Password Reset Request",
+    header_style="background: #dc3545; padding: 20px;",
+    extra_style=".otp { font-size: 32px; font-weight: bold; text-align: center; color: #dc3545; margin: 20px 0; }",
+    html_content="""
+                <h2>Hello $name,</h2>
+                <p>You requested to reset your password. Use the OTP below to verify your identity:</p>
+
+                <div class="otp">$otp</div>
+
+                <p>This OTP is valid for 10 minutes. If you didn't request this reset, please ignore this email.</p>
+""",
+    text_content="""Hello $name,
+
+You requested to reset your password. Use the OTP below to verify your identity:
+
+$otp
+
+This OTP is valid for 10 minutes. If you didn't request this reset, please ignore this email."""
+))
+
+email_templates.register(EmailTemplate(
+    name="expiry_reminder",
+    subject="Your TVA $plan plan expires on $end_date",
+    title="Your Subscription Is Expiring Soon",
+    header_style="background: #f0ad4e; padding: 20px;",
+    extra_style=".button { background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; display: inline-block; }",
+    html_content="""
+                <h2>Hello $name,</h2>
+                <p>Your TVA <strong>$plan</strong> plan for <strong>$website</strong> expires on <strong>$end_date</strong> ($days_left days from now).</p>
+
+                <p>Renew before then to keep TVA answering your visitors without interruption.</p>
+
+                <a href="http://localhost:8000/login" class="button">Renew Subscription</a>
+""",
+    text_content="""Hello $name,
+
+Your TVA $plan plan for $website expires on $end_date ($days_left days from now).
+
+Renew before then to keep TVA answering your visitors without interruption.
+
+Renew Subscription: http://localhost:8000/login"""
+))
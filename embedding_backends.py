@@ -0,0 +1,87 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Pre-quantized exports published alongside the model on the Hugging Face hub; pick the one matching the CPU
+ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+class EmbeddingBackend:
+    """Sentence embedding model behind one interface: encode(list[str]) -> normalized float32 matrix"""
+
+    name = None
+    # Quantized vectors drift slightly, so they are never mixed with float ones
+    quantized = False
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = self._load()
+
+    def _load(self):
+        raise NotImplementedError
+
+    def encode(self, texts) -> np.ndarray:
+        embeddings = self.model.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(self.model_name, device="cpu")
+        model.eval()
+        return model
+
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime export of the same weights; needs `pip install optimum[onnxruntime]`"""
+
+    name = "onnx"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name, device="cpu", backend="onnx")
+
+
+class OnnxInt8Backend(EmbeddingBackend):
+    """Dynamically int8-quantized ONNX export; fastest on CPU with a small similarity drift"""
+
+    name = "onnx-int8"
+    quantized = True
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(
+            self.model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_INT8_FILE}
+        )
+
+
+BACKENDS = {backend.name: backend for backend in (TorchBackend, OnnxBackend, OnnxInt8Backend)}
+
+
+def get_backend_class(backend: str = None):
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend]
+
+
+def get_embedding_id(model_name: str, backend: str = None) -> str:
+    """Stored with each question embedding, so vectors from an incompatible backend are re-embedded"""
+    backend_class = get_backend_class(backend)
+    return f"{model_name}:{backend_class.name}" if backend_class.quantized else model_name
+
+
+def load_backend(model_name: str, backend: str = None) -> EmbeddingBackend:
+    return get_backend_class(backend)(model_name)
@@ -0,0 +1,223 @@
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from database import db
+from email_service import EmailService
+from email_templates import email_templates
+
+load_dotenv()
+
+REMINDER_PROJECTION = {
+    "name": 1,
+    "email": 1,
+    "website": 1,
+    "subscription_plan": 1,
+    "subscription_end": 1
+}
+
+# Matches clients not yet reminded for their current subscription_end, so a renewal re-arms the reminder
+NOT_REMINDED = {"$expr": {"$ne": ["$expiry_reminder_sent_for", "$subscription_end"]}}
+
+
+def claimable(now: datetime, lease: timedelta) -> dict:
+    """Not claimed by a run, or claimed by one that crashed before marking the reminder sent"""
+    return {"$or": [
+        {"expiry_reminder_claimed_at": {"$exists": False}},
+        {"expiry_reminder_claimed_at": {"$lt": now - lease}}
+    ]}
+
+
+class ExpiryReminderJob:
+    """Emails clients whose subscription ends within the next few days, once per subscription period"""
+
+    def __init__(self, days: int = None, rate: float = None, interval: float = None):
+        self.days = days or int(os.getenv("EXPIRY_REMINDER_DAYS", 3))
+        # Messages per second, to stay under the SMTP provider's sending limits
+        self.rate = rate or float(os.getenv("EXPIRY_REMINDER_RATE", 5))
+        self.interval = interval or float(os.getenv("EXPIRY_REMINDER_INTERVAL", 6 * 3600))
+        self.lease = timedelta(seconds=float(os.getenv("EXPIRY_REMINDER_LEASE_SECONDS", 900)))
+        # Its own SMTP connection, so closing it after a run leaves the outbox worker's connection alone
+        self.sender = EmailService()
+        self._task = None
+
+        self.runs = 0
+        self.last_report = None
+
+    def find_expiring(self, days: int) -> list:
+        now = datetime.utcnow()
+        # Range scan on the subscription_end index; the other conditions only filter what the range returns
+        return list(db.get_collection("clients").find(
+            {
+                "subscription_end": {"$gt": now, "$lte": now + timedelta(days=days)},
+                "is_active": {"$ne": False},
+                **NOT_REMINDED,
+                **claimable(now, self.lease)
+            },
+            REMINDER_PROJECTION
+        ).sort("_id", 1))
+
+    def run(self, days: int = None, rate: float = None, dry_run: bool = False) -> dict:
+        """One pass: query, render in batch, send over one SMTP connection; returns the run report"""
+        days = self.days if days is None else days
+        rate = self.rate if rate is None else rate
+        clients_collection = db.get_collection("clients")
+        started = time.perf_counter()
+        connects_before = self.sender.connects
+        now = datetime.utcnow()
+        candidates = self.find_expiring(days)
+
+        report = {
+            "started_at": now.isoformat(),
+            "days": days,
+            "dry_run": dry_run,
+            "candidates": len(candidates),
+            "duplicates": 0,
+            "without_email": 0,
+            "claimed_elsewhere": 0,
+            "sent": 0,
+            "failed": 0,
+            "failures": []
+        }
+
+        # The same address can own several client records for one website, e.g. after a repeated signup;
+        # they get one email, and are marked reminded along with the first record
+        recipients = []
+        duplicates = {}
+        for client in candidates:
+            key = ((client.get("email") or "").lower(), client.get("website"))
+            if not key[0]:
+                report["without_email"] += 1
+                continue
+            if key in duplicates:
+                duplicates[key].append(client)
+                report["duplicates"] += 1
+                continue
+            duplicates[key] = []
+            recipients.append(client)
+
+        render_started = time.perf_counter()
+        emails = email_templates.render_many("expiry_reminder", (
+            {
+                "name": client.get("name", ""),
+                "website": client.get("website", ""),
+                "plan": client.get("subscription_plan", "trial"),
+                "days_left": math.ceil((client["subscription_end"] - now).total_seconds() / 86400),
+                "end_date": client["subscription_end"].strftime("%d %b %Y")
+            }
+            for client in recipients
+        ))
+        report["render_seconds"] = round(time.perf_counter() - render_started, 3)
+        report["rendered"] = len(emails)
+
+        if not dry_run:
+            interval = 1.0 / rate if rate > 0 else 0
+            next_send = time.monotonic()
+            for client, email in zip(recipients, emails):
+                # Lease the client before sending, so overlapping runs on other workers skip it;
+                # if this run dies before marking it sent, the lease expires and a later run retries
+                claimed_at = datetime.utcnow()
+                claim = clients_collection.update_one(
+                    {
+                        "_id": client["_id"],
+                        "subscription_end": client["subscription_end"],
+                        **NOT_REMINDED,
+                        **claimable(claimed_at, self.lease)
+                    },
+                    {"$set": {"expiry_reminder_claimed_at": claimed_at}}
+                )
+                if claim.modified_count == 0:
+                    report["claimed_elsewhere"] += 1
+                    continue
+
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send, time.monotonic()) + interval
+
+                try:
+                    # The connection is opened once and reused for every reminder in the run
+                    self.sender.deliver(self.sender.build_message(
+                        client["email"], email.subject, email.html, is_html=True, text_body=email.text
+                    ))
+                except Exception as e:
+                    # Release the lease so the next run retries this client
+                    clients_collection.update_one(
+                        {"_id": client["_id"], "expiry_reminder_claimed_at": claimed_at},
+                        {"$unset": {"expiry_reminder_claimed_at": ""}}
+                    )
+                    report["failed"] += 1
+                    if len(report["failures"]) < 20:
+                        report["failures"].append({
+                            "client_id": str(client["_id"]),
+                            "email": client["email"],
+                            "error": str(e)
+                        })
+                    continue
+
+                report["sent"] += 1
+                key = (client["email"].lower(), client.get("website"))
+                for reminded in [client] + duplicates[key]:
+                    clients_collection.update_one(
+                        {"_id": reminded["_id"]},
+                        {
+                            "$set": {"expiry_reminder_sent_for": reminded["subscription_end"]},
+                            "$unset": {"expiry_reminder_claimed_at": ""}
+                        }
+                    )
+            self.sender.close()
+
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["emails_per_second"] = round(report["sent"] / elapsed, 2) if elapsed else 0
+        report["smtp_connects"] = self.sender.connects - connects_before
+
+        if not dry_run:
+            db.get_collection("logs").insert_one({
+                "action": "expiry_reminder_run",
+                "user_type": "system",
+                "details": dict(report),
+                "timestamp": datetime.utcnow()
+            })
+        self.runs += 1
+        self.last_report = report
+        print(f"✅ Expiry reminders: {report['sent']} sent, {report['failed']} failed, "
+              f"{report['duplicates']} duplicates skipped in {report['elapsed_seconds']}s")
+        return report
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                # pymongo and smtplib block, so the whole run stays off the event loop
+                await asyncio.to_thread(self.run)
+            except Exception as e:
+                print(f"❌ Error sending expiry reminders: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "days": self.days,
+            "rate": self.rate,
+            "interval": self.interval,
+            "runs": self.runs,
+            "running": self._task is not None,
+            "last_report": self.last_report
+        }
+
+
+expiry_reminder_job = ExpiryReminderJob()
@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class InferenceBusyError(Exception):
+    """Raised when inference work is rejected because the queue is full"""
+
+
+class InferenceExecutor:
+    """Bounded thread pool that runs CPU-bound model work off the event loop"""
+
+    def __init__(self, max_workers: int = None, max_pending: int = None):
+        # Torch and NumPy release the GIL during their heavy kernels, so threads run in parallel
+        self.max_workers = max_workers or int(os.getenv("INFERENCE_WORKERS", 2))
+        self.max_pending = max_pending or int(os.getenv("INFERENCE_MAX_PENDING", 64))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+        # Metrics, only touched from the event loop thread
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn in the pool, failing fast with InferenceBusyError when it is saturated"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceBusyError("Inference queue is full")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class EmbeddingBatcher:
+    """Collects concurrent query encodes into a single batched model call"""
+
+    def __init__(self, encode, executor: InferenceExecutor = None, max_batch_size: int = None,
+                 max_wait_ms: float = None, max_queue: int = None):
+        self.encode = encode
+        self.executor = executor
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5))
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue or int(os.getenv("EMBEDDING_MAX_QUEUE", 256))
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._tasks = set()
+        self.rejected = 0
+
+        # Metrics
+        self.total_batches = 0
+        self.total_items = 0
+        self.max_batch_seen = 0
+        self.last_batch_size = 0
+        self.max_queue_depth = 0
+        self.batch_size_counts = {}
+
+    async def encode_one(self, text: str):
+        """Encode a single text, sharing the forward pass with concurrent callers"""
+        self._ensure_worker()
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise InferenceBusyError("Embedding queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+                # One in-flight batch per executor worker; extra requests keep filling the next batch
+                self._slots = asyncio.Semaphore(self.executor.max_workers if self.executor else 1)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            await self._slots.acquire()
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued before waiting for more
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = loop.create_task(self._process(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch):
+        try:
+            await self._encode_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _encode_batch(self, batch):
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self._record(len(batch))
+        texts = [text for text, _ in batch]
+        try:
+            if self.executor is not None:
+                vectors = await self.executor.run(self.encode, texts)
+            else:
+                vectors = self.encode(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def _record(self, batch_size):
+        self.total_batches += 1
+        self.total_items += batch_size
+        self.last_batch_size = batch_size
+        self.max_batch_seen = max(self.max_batch_seen, batch_size)
+        self.batch_size_counts[batch_size] = self.batch_size_counts.get(batch_size, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "total_batches": self.total_batches,
+            "total_items": self.total_items,
+            "average_batch_size": round(self.total_items / self.total_batches, 2) if self.total_batches else 0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "last_batch_size": self.last_batch_size,
+            "batch_size_counts": {str(size): count for size, count in sorted(self.batch_size_counts.items())},
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
@@ -1,28 +1,43 @@
 from fastapi import FastAPI, HTTPException, Depends, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sentence_transformers import SentenceTransformer, util
+from fastapi.responses import JSONResponse, StreamingResponse, RedirectResponse
 import numpy as np
 from datetime import datetime, timedelta
 import razorpay
+import asyncio
 import os
 import random
 from dotenv import load_dotenv
 from bson import ObjectId
+from pymongo import ReturnDocument
 from database import db
+from question_cache import QuestionEmbeddingCache
+from model_provider import model_provider
+from inference import EmbeddingBatcher, InferenceExecutor, InferenceBusyError
+from matcher import EXACT_INDEX_MAX_LEARNED, get_match_settings, normalize_question
+from cache import TTLCache
+from client_directory import client_directory
+from principal_cache import principal_cache, PRINCIPAL_COLLECTIONS
+from quota import quota_service, settled_hits_used
+from stats_buffer import question_stats_buffer, get_top_asked_questions
+from prewarm import answer_prewarmer
+from tts_cache import tts_cache
+from translation_service import translation_service
+from plans import get_plan_limits, sync_all_clients_subscriptions
 from models import *
 from auth import *
 from fastapi.responses import FileResponse
 import base64
-from email_service import email_service, get_welcome_email_template, get_password_reset_email_template
+from email_templates import email_templates
+from email_outbox import email_outbox
+from expiry_reminders import expiry_reminder_job
 import secrets
 import string
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 from fastapi import FastAPI, Request
 from fastapi.responses import FileResponse
-from gtts import gTTS
 import tempfile, os
-from googletrans import Translator
 import re
 load_dotenv()
 
@@ -68,6 +83,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Upper bound on texts per /translate/batch request
+TRANSLATE_BATCH_MAX = int(os.getenv("TRANSLATE_BATCH_MAX", 100))
+
 @app.post("/translate")
 async def translate_text(translation_data: dict):
     text = translation_data.get("text")
@@ -78,9 +96,28 @@ async def translate_text(translation_data: dict):
         raise HTTPException(status_code=400, detail="Text is required")
     
     try:
-        translator = Translator()
-        translation = translator.translate(text, src=source_lang, dest=target_lang)
-        return {"translated_text": translation.text}
+        # Served from the translation memory when the text was seen before, e.g. popular answers prewarmed at startup
+        translated_text = await translation_service.translate(text, source_lang, target_lang)
+        return {"translated_text": translated_text}
+        
+    except Exception as e:
+        print(f"Translation error: {e}")
+        raise HTTPException(status_code=500, detail="Translation failed")
+
+@app.post("/translate/batch")
+async def translate_batch(translation_data: dict):
+    texts = translation_data.get("texts")
+    source_lang = translation_data.get("source_lang", "en")
+    target_lang = translation_data.get("target_lang", "te")
+    
+    if not isinstance(texts, list) or not texts or not all(isinstance(text, str) for text in texts):
+        raise HTTPException(status_code=400, detail="texts must be a non-empty list of strings")
+    if len(texts) > TRANSLATE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {TRANSLATE_BATCH_MAX} texts per request")
+    
+    try:
+        translations = await translation_service.translate_many(texts, source_lang, target_lang)
+        return {"translations": translations}
         
     except Exception as e:
         print(f"Translation error: {e}")
@@ -91,58 +128,144 @@ async def tts(request: Request):
     data = await request.json()
     text = data.get("text", "")
     lang = data.get("lang", "en")
-    lang_code = "te" if lang == "te" else "en"
-    tts = gTTS(text=text, lang=lang_code, slow=False)
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    tts.save(tmp.name)
-    return FileResponse(tmp.name, media_type="audio/mpeg")
+    
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required")
+    
+    # Long answers can be streamed sentence by sentence, so playback starts before the whole answer is synthesized
+    if data.get("stream"):
+        return StreamingResponse(
+            tts_cache.stream(text, lang),
+            media_type="audio/mpeg",
+            headers={"Cache-Control": "no-store"}
+        )
+    
+    try:
+        key, _ = await tts_cache.get_or_synthesize(text, lang)
+    except Exception as e:
+        print(f"TTS error: {e}")
+        raise HTTPException(status_code=500, detail="Speech synthesis failed")
+    
+    # POST responses are not cached by browsers or CDNs, so the audio itself is served from a cacheable GET
+    return RedirectResponse(f"/tts/{key}", status_code=303)
+
+@app.get("/tts/{key}")
+async def tts_audio(key: str, request: Request):
+    if not re.fullmatch(r"[0-9a-f]{64}", key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    # Audio is addressed by its content, so the key doubles as a strong ETag and the response never changes
+    headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=86400, immutable"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    path = tts_cache.get(key)
+    if path is None:
+        # Evicted from the disk cache; POST /tts again to resynthesize it
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return FileResponse(path, media_type="audio/mpeg", headers=headers)
+
+
+# Initialize models; the embedding model itself loads after startup (or before fork with EMBEDDING_PRELOAD)
+# With EMBEDDING_LAZY_LOAD it only loads once the first visitor query needs it
+EMBEDDING_LAZY_LOAD = os.getenv("EMBEDDING_LAZY_LOAD", "false").lower() == "true"
+question_cache = QuestionEmbeddingCache(model_provider, model_provider.embedding_id)
+inference_executor = InferenceExecutor()
+query_batcher = EmbeddingBatcher(question_cache.encode, executor=inference_executor)
+
+# Resolved answers keyed by (website, normalized question, language)
+answer_cache = TTLCache(
+    maxsize=int(os.getenv("ANSWER_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", 600))
+)
 
+def invalidate_client_questions(client_id: str):
+    """Drop cached question data for a client after its questions change"""
+    question_cache.invalidate(str(client_id))
+    answer_cache.invalidate_tag(str(client_id))
 
-# Initialize models
-model = SentenceTransformer('all-MiniLM-L6-v2')
+async def bump_questions_version(client_id):
+    """Count a write to a client's questions, so every worker's cached matcher for it goes stale"""
+    try:
+        updated = await db.get_async_collection("clients").find_one_and_update(
+            {"_id": ObjectId(str(client_id))},
+            {"$inc": {"questions_version": 1}},
+            projection={"questions_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        # The write itself succeeded; other workers pick it up when their cached matcher expires
+        print(f"⚠️ Could not bump questions_version for client {client_id}: {e}")
+        return None
+    return updated.get("questions_version") if updated else None
+
+async def question_saved(client_id, question_id, question: dict):
+    """Apply an added or edited question to the cached matcher in place and drop the client's cached answers"""
+    version = await bump_questions_version(client_id)
+    question_cache.upsert_question(
+        str(client_id), str(question_id), question["question"], question["answer"], question["embedding"],
+        version=version
+    )
+    answer_cache.invalidate_tag(str(client_id))
+
+# Alias writes in flight, kept referenced until they finish
+alias_writes = set()
+
+async def save_question_alias(client_id: str, query: str, best, margin: float):
+    """Persist a learned visitor phrasing, so rebuilt matchers and other workers answer it exactly"""
+    aliases_collection = db.get_async_collection("question_aliases")
+    # Matchers load at most this many, so storing more only grows the collection
+    if await aliases_collection.count_documents({"client_id": client_id}) >= EXACT_INDEX_MAX_LEARNED:
+        return
+    normalized = normalize_question(query)
+    await aliases_collection.update_one(
+        {"_id": f"{client_id}:{normalized}"},
+        {"$setOnInsert": {
+            "client_id": client_id,
+            "query": normalized,
+            "question_id": best.question_id,
+            # The matched question's text, so the alias is dropped once that question is reworded
+            "question_text": best.question,
+            "score": best.score,
+            "margin": margin,
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+def schedule_question_alias(client_id: str, query: str, best, margin: float):
+    """Store a learned phrasing in the background, off the visitor's request"""
+    async def write():
+        try:
+            await save_question_alias(client_id, query, best, margin)
+        except Exception as e:
+            print(f"⚠️ Could not store question alias: {e}")
+
+    task = asyncio.get_running_loop().create_task(write())
+    alias_writes.add(task)
+    task.add_done_callback(alias_writes.discard)
+
+async def question_deleted(client_id, question_id):
+    """Retire a deleted question from the cached matcher and drop the client's cached answers"""
+    version = await bump_questions_version(client_id)
+    question_cache.remove_question(str(client_id), str(question_id), version=version)
+    answer_cache.invalidate_tag(str(client_id))
 
 # Razorpay setup
 razorpay_client = razorpay.Client(
     auth=(os.getenv("RAZORPAY_KEY_ID"), os.getenv("RAZORPAY_KEY_SECRET"))
 )
 
-# Helper function to get plan limits
-def get_plan_limits(plan):
-    """Get the limits for each subscription plan"""
-    plan_limits = {
-        "trial": {
-            "questions_allowed": 5,
-            "user_hits_allowed": 50,
-            "duration_days": 2
-        },
-        "monthly": {
-            "questions_allowed": 15,
-            "user_hits_allowed": 100,
-            "duration_days": 30
-        },
-        "quarterly": {
-            "questions_allowed": 70,
-            "user_hits_allowed": 400,
-            "duration_days": 90
-        },
-        "yearly": {
-            "questions_allowed": 150,
-            "user_hits_allowed": 1200,
-            "duration_days": 365
-        }
-    }
-    return plan_limits.get(plan, plan_limits["trial"])
-
 # Centralized function to update client subscription
-def update_client_subscription(client_id: str, new_plan: str, is_new_subscription: bool = False):
+async def update_client_subscription(client_id: str, new_plan: str, is_new_subscription: bool = False):
     """
     Update client subscription with all related fields
     """
-    clients_collection = db.get_collection("clients")
+    clients_collection = db.get_async_collection("clients")
     
     try:
         # Get current client data
-        client = clients_collection.find_one({"_id": ObjectId(client_id)})
+        client = await clients_collection.find_one({"_id": ObjectId(client_id)})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -170,98 +293,117 @@ def update_client_subscription(client_id: str, new_plan: str, is_new_subscriptio
                 update_data["subscription_start"] = client.get("subscription_start", current_time)
                 update_data["subscription_end"] = current_end + timedelta(days=plan_limits["duration_days"])
         
+        update = {"$set": update_data}
+        
         # Reset usage counters when changing from trial to paid plan
         if client.get("subscription_plan") == "trial" and new_plan != "trial":
             update_data["questions_used"] = 0
             update_data["user_hits_used"] = 0
+            update_data["user_hits_reserved"] = 0
+            # Hit blocks other workers reserved before the reset must not be released into the new counter
+            update["$inc"] = {"quota_epoch": 1}
+        
+        # Settle hits reserved under the old plan before its limits change
+        await quota_service.release(client_id)
         
         # Apply the update
-        result = clients_collection.update_one(
+        result = await clients_collection.update_one(
             {"_id": ObjectId(client_id)},
-            {"$set": update_data}
+            update
         )
+        principal_cache.invalidate(client_id)
         
         if result.modified_count == 0:
             print(f"Warning: No documents were updated for client {client_id}")
+        client_directory.invalidate(client_id)
         
         # Return the updated subscription data
-        updated_client = clients_collection.find_one({"_id": ObjectId(client_id)})
+        updated_client = await clients_collection.find_one({"_id": ObjectId(client_id)})
         return updated_client
         
     except Exception as e:
         print(f"Error updating client subscription: {str(e)}")
         raise
 
-# Function to sync subscription limits for all clients
-def sync_all_clients_subscriptions():
-    """Sync subscription limits for all clients based on their current plan"""
-    clients_collection = db.get_collection("clients")
-    
-    try:
-        clients = clients_collection.find({})
-        synced_count = 0
-        
-        for client in clients:
-            current_plan = client.get("subscription_plan", "trial")
-            plan_limits = get_plan_limits(current_plan)
-            
-            # Check if limits need to be updated
-            needs_update = (
-                client.get("questions_allowed") != plan_limits["questions_allowed"] or
-                client.get("user_hits_allowed") != plan_limits["user_hits_allowed"]
-            )
-            
-            if needs_update:
-                update_data = {
-                    "questions_allowed": plan_limits["questions_allowed"],
-                    "user_hits_allowed": plan_limits["user_hits_allowed"]
-                }
-                
-                clients_collection.update_one(
-                    {"_id": client["_id"]},
-                    {"$set": update_data}
-                )
-                synced_count += 1
-                print(f"Synced subscription limits for client: {client.get('email')}")
-        
-        print(f"Subscription sync completed. Updated {synced_count} clients.")
-        return synced_count
-        
-    except Exception as e:
-        print(f"Error syncing all client subscriptions: {str(e)}")
-        return 0
-
 # Add startup event to create default admin and update CORS
 @app.on_event("startup")
 async def startup_event():
     admins_collection = db.get_collection("admins")
     
-    # Create default admin if none exists
-    default_admin = {
-        "name": "System Admin",
-        "email": "admin@speechbot.com", 
-        "password": get_password_hash("admin123"),
-        "mobile": "+911111111111",
-        "is_active": True,
-        "created_at": datetime.utcnow()
-    }
+    # Migrations, indexes and subscription sync run from `python manage.py migrate`, not on every boot
+    db.check_schema_version()
     
-    if not admins_collection.find_one({"email": "admin@speechbot.com"}):
+    # Create default admin if none exists
+    if not admins_collection.find_one({"email": "admin@speechbot.com"}, {"_id": 1}):
+        default_admin = {
+            "name": "System Admin",
+            "email": "admin@speechbot.com", 
+            "password": get_password_hash("admin123"),
+            "mobile": "+911111111111",
+            "is_active": True,
+            "created_at": datetime.utcnow()
+        }
         admins_collection.insert_one(default_admin)
         print("✅ Created default admin: admin@speechbot.com / admin123")
     else:
         print("✅ Default admin already exists")
     
-    # Sync all client subscriptions on startup
-    print("🔄 Syncing all client subscriptions...")
-    synced_count = sync_all_clients_subscriptions()
-    print(f"✅ Synced {synced_count} client subscriptions")
-    
     # Update CORS origins with client websites
     print("🔄 Updating CORS origins with client websites...")
+    
+    if os.getenv("CLIENT_DIRECTORY_CHANGE_STREAM", "false").lower() == "true":
+        client_directory.start_change_stream()
+    
+    question_stats_buffer.start()
+    
+    if os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() == "true":
+        email_outbox.start()
+    
+    # Translate (and optionally synthesize) the most asked answers before visitors request them
+    if os.getenv("PREWARM_ENABLED", "true").lower() == "true":
+        answer_prewarmer.start()
+    
+    # Off by default: with several API workers, run it on one of them or from cron via manage.py
+    if os.getenv("EXPIRY_REMINDERS_ENABLED", "false").lower() == "true":
+        expiry_reminder_job.start()
+    
+    # Load and warm up the embedding model without holding up the server; /health reports when it is ready
+    if not EMBEDDING_LAZY_LOAD:
+        model_provider.start_background_load()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await query_batcher.close()
+    inference_executor.shutdown()
+    await quota_service.release_all()
+    if alias_writes:
+        await asyncio.gather(*alias_writes, return_exceptions=True)
+    await question_stats_buffer.stop()
+    await answer_prewarmer.stop()
+    await expiry_reminder_job.stop()
+    await translation_service.close()
+    await email_outbox.stop()
+    tts_cache.shutdown()
+    password_executor.shutdown(wait=False, cancel_futures=True)
 
-# Dependency to get current user
-async def get_current_user(authorization: str = Header(None)):
+# Readiness probe: 503 until the embedding model is loaded and warmed up. In lazy mode nothing loads
+# until the first query, so the worker reports ready ("lazy") instead of staying out of rotation forever
+@app.get("/health")
+async def health():
+    model_status = model_provider.status()
+    if model_status["ready"]:
+        status = "ok"
+    elif EMBEDDING_LAZY_LOAD:
+        status = "lazy"
+    else:
+        status = "starting"
+    return JSONResponse(
+        status_code=503 if status == "starting" else 200,
+        content={"status": status, "model": model_status}
+    )
+
+# Dependency that validates the bearer token and returns its claims, without a user lookup
+async def get_token_claims(authorization: str = Header(None)):
     if not authorization:
         raise HTTPException(
             status_code=401, 
@@ -297,47 +439,45 @@ async def get_current_user(authorization: str = Header(None)):
             detail="Invalid token payload"
         )
     
+    if user_type not in PRINCIPAL_COLLECTIONS:
+        raise HTTPException(status_code=401, detail="Invalid user type")
+    
+    return {"_id": user_id, "user_type": user_type}
+
+# Dependency to get current user; the slim profile is served from the principal cache
+async def get_current_user(claims: dict = Depends(get_token_claims)):
     try:
-        if user_type == "admin":
-            user = db.get_collection("admins").find_one({"_id": ObjectId(user_id)})
-        elif user_type == "client":
-            user = db.get_collection("clients").find_one({"_id": ObjectId(user_id)})
-        else:
-            raise HTTPException(status_code=401, detail="Invalid user type")
-        
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        
-        # Convert ObjectId to string for JSON serialization
-        user["_id"] = str(user["_id"])
-            
-        return {**user, "user_type": user_type}
-        
+        user = await principal_cache.get(claims["user_type"], claims["_id"])
     except Exception as e:
-        raise HTTPException(status_code=401, detail=f"User lookup failed: {str(e)}") 
+        raise HTTPException(status_code=401, detail=f"User lookup failed: {str(e)}")
+    
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    return user
 
 # Auth endpoints
 @app.post("/signup")
 async def signup(signup_data: SignupRequest):
-    clients_collection = db.get_collection("clients")
+    clients_collection = db.get_async_collection("clients")
     
     # Check if email already exists
-    if clients_collection.find_one({"email": signup_data.email}):
+    if await clients_collection.find_one({"email": signup_data.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Check if website already exists for this email
-    if clients_collection.find_one({"email": signup_data.email, "website": signup_data.website}):
+    if await clients_collection.find_one({"email": signup_data.email, "website": signup_data.website}):
         raise HTTPException(status_code=400, detail="Website already registered for this email")
     
     # Check if mobile already exists (if provided)
-    if signup_data.mobile and clients_collection.find_one({"mobile": signup_data.mobile}):
+    if signup_data.mobile and await clients_collection.find_one({"mobile": signup_data.mobile}):
         raise HTTPException(status_code=400, detail="Mobile number already registered")
     
     # Create client using centralized subscription function
     client_data = {
         "name": signup_data.name,
         "email": signup_data.email,
-        "password": get_password_hash(signup_data.password),
+        "password": await get_password_hash_async(signup_data.password),
         "website": signup_data.website,
         "mobile": signup_data.mobile,
         "business_type": signup_data.business_type,
@@ -352,20 +492,16 @@ async def signup(signup_data: SignupRequest):
         "created_at": datetime.utcnow()
     }
     
-    result = clients_collection.insert_one(client_data)
+    result = await clients_collection.insert_one(client_data)
     client_id = str(result.inserted_id)
+    client_directory.invalidate_website(signup_data.website)
     
     # Use centralized function to set up trial subscription
-    update_client_subscription(client_id, "trial", is_new_subscription=True)
-    
-    # Send welcome email
-    email_body = get_welcome_email_template(signup_data.name, signup_data.website)
-    email_service.send_email(
-        signup_data.email,
-        "Welcome to TVA!",
-        email_body,
-        is_html=True
-    )
+    await update_client_subscription(client_id, "trial", is_new_subscription=True)
+    
+    # Queue welcome email; the outbox worker sends it
+    welcome_email = email_templates.render("welcome", name=signup_data.name, website=signup_data.website)
+    await email_outbox.enqueue_rendered(signup_data.email, welcome_email, kind="welcome")
     
     # Create log
     log_entry = {
@@ -376,14 +512,14 @@ async def signup(signup_data: SignupRequest):
         "details": {"website": signup_data.website, "mobile": signup_data.mobile},
         "timestamp": datetime.utcnow()
     }
-    db.get_collection("logs").insert_one(log_entry)
+    await db.get_async_collection("logs").insert_one(log_entry)
     
     return {"message": "Signup successful. Welcome email sent!", "client_id": client_id}
 
 @app.post("/forgot-password")
 async def forgot_password(forgot_data: ForgotPasswordRequest):
-    clients_collection = db.get_collection("clients")
-    admins_collection = db.get_collection("admins")
+    clients_collection = db.get_async_collection("clients")
+    admins_collection = db.get_async_collection("admins")
     
     # Check in all collections
     user = None
@@ -391,7 +527,7 @@ async def forgot_password(forgot_data: ForgotPasswordRequest):
     name = None
     
     # Check clients
-    client = clients_collection.find_one({"email": forgot_data.email})
+    client = await clients_collection.find_one({"email": forgot_data.email})
     if client:
         user = client
         user_type = "client"
@@ -399,7 +535,7 @@ async def forgot_password(forgot_data: ForgotPasswordRequest):
     
     # Check admins
     if not user:
-        admin = admins_collection.find_one({"email": forgot_data.email})
+        admin = await admins_collection.find_one({"email": forgot_data.email})
         if admin:
             user = admin
             user_type = "admin"
@@ -422,27 +558,22 @@ async def forgot_password(forgot_data: ForgotPasswordRequest):
         "expires_at": datetime.utcnow() + timedelta(minutes=10)
     }
     
-    db.get_collection("password_reset_otps").insert_one(otp_entry)
+    await db.get_async_collection("password_reset_otps").insert_one(otp_entry)
     
-    # Send password reset email
-    email_body = get_password_reset_email_template(name, otp)
-    email_service.send_email(
-        forgot_data.email,
-        "Password Reset OTP - SpeechBot",
-        email_body,
-        is_html=True
-    )
+    # Queue password reset email; the outbox worker sends it
+    reset_email = email_templates.render("password_reset", name=name, otp=otp)
+    await email_outbox.enqueue_rendered(forgot_data.email, reset_email, kind="password_reset")
     
     return {"message": "Password reset OTP sent to your email"}
 
 @app.post("/reset-password")
 async def reset_password(reset_data: ResetPasswordRequest):
-    otp_collection = db.get_collection("password_reset_otps")
-    clients_collection = db.get_collection("clients")
-    admins_collection = db.get_collection("admins")
+    otp_collection = db.get_async_collection("password_reset_otps")
+    clients_collection = db.get_async_collection("clients")
+    admins_collection = db.get_async_collection("admins")
     
     # Find the most recent OTP for this email
-    otp_record = otp_collection.find_one(
+    otp_record = await otp_collection.find_one(
         {"email": reset_data.email, "purpose": "password_reset", "verified": False},
         sort=[("created_at", -1)]
     )
@@ -459,38 +590,52 @@ async def reset_password(reset_data: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="Invalid OTP")
     
     # Mark OTP as verified
-    otp_collection.update_one(
+    await otp_collection.update_one(
         {"_id": otp_record["_id"]},
         {"$set": {"verified": True}}
     )
     
     # Update password in the appropriate collection
-    hashed_password = get_password_hash(reset_data.new_password)
+    hashed_password = await get_password_hash_async(reset_data.new_password)
     
     # Try to update in clients
-    result = clients_collection.update_one(
+    user = await clients_collection.find_one_and_update(
         {"email": reset_data.email},
-        {"$set": {"password": hashed_password}}
+        {"$set": {"password": hashed_password}},
+        projection={"_id": 1}
     )
     
     # If not in clients, try admins
-    if result.modified_count == 0:
-        result = admins_collection.update_one(
+    if user is None:
+        user = await admins_collection.find_one_and_update(
             {"email": reset_data.email},
-            {"$set": {"password": hashed_password}}
+            {"$set": {"password": hashed_password}},
+            projection={"_id": 1}
         )
     
-    if result.modified_count == 0:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    principal_cache.invalidate(user["_id"])
     
     return {"message": "Password reset successfully"}
 
+async def check_login_password(collection, user: dict, password: str) -> bool:
+    """Verify off the event loop, upgrading the stored hash if BCRYPT_ROUNDS changed since it was made"""
+    verified, new_hash = await verify_and_update_password(password, user["password"])
+    if verified and new_hash:
+        await collection.update_one(
+            {"_id": user["_id"], "password": user["password"]},
+            {"$set": {"password": new_hash}}
+        )
+    return verified
+
 # Login route
 @app.post("/login")
 async def login(login_data: LoginRequest):
     # Check in clients
-    client = db.get_collection("clients").find_one({"email": login_data.email})
-    if client and verify_password(login_data.password, client["password"]):
+    clients_collection = db.get_async_collection("clients")
+    client = await clients_collection.find_one({"email": login_data.email})
+    if client and await check_login_password(clients_collection, client, login_data.password):
         token = create_access_token(
             data={"user_id": str(client["_id"]), "user_type": "client"},
             expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -498,8 +643,9 @@ async def login(login_data: LoginRequest):
         return {"access_token": token, "token_type": "bearer", "user_type": "client"}
     
     # Check in admins
-    admin = db.get_collection("admins").find_one({"email": login_data.email})
-    if admin and verify_password(login_data.password, admin["password"]):
+    admins_collection = db.get_async_collection("admins")
+    admin = await admins_collection.find_one({"email": login_data.email})
+    if admin and await check_login_password(admins_collection, admin, login_data.password):
         token = create_access_token(
             data={"user_id": str(admin["_id"]), "user_type": "admin"},
             expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -550,10 +696,14 @@ async def update_profile(profile_data: dict, current_user: dict = Depends(get_cu
             update_data["tan"] = profile_data["tan"]
         
         if update_data:
-            db.get_collection(collection_name).update_one(
+            await db.get_async_collection(collection_name).update_one(
                 {"_id": ObjectId(current_user["_id"])},
                 {"$set": update_data}
             )
+            principal_cache.invalidate(current_user["_id"])
+            if user_type == "client":
+                client_directory.invalidate(current_user["_id"])
+                client_directory.invalidate_website(update_data.get("website"))
         
         return {"message": "Profile updated successfully"}
     except Exception as e:
@@ -565,32 +715,32 @@ async def get_client_question_stats(current_user: dict = Depends(get_current_use
     if current_user["user_type"] != "client":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    questions_collection = db.get_collection("questions")
-    question_stats_collection = db.get_collection("question_stats")
-    question_requests_collection = db.get_collection("question_requests")
+    questions_collection = db.get_async_collection("questions", read_only=True)
+    question_stats_collection = db.get_async_collection("question_stats", read_only=True)
+    question_requests_collection = db.get_async_collection("question_requests", read_only=True)
     
     try:
         client_id = str(current_user["_id"])
         
         # Get valid questions count
-        valid_questions_count = questions_collection.count_documents({"client_id": client_id})
+        valid_questions_count = await questions_collection.count_documents({"client_id": client_id})
         
         # Get requested questions count (questions without answers in question_stats)
-        requested_questions_count = question_stats_collection.count_documents({
+        requested_questions_count = await question_stats_collection.count_documents({
             "client_id": client_id,
             "question_id": {"$exists": False}
         })
         
         # Get pending modification requests count
-        pending_requests_count = question_requests_collection.count_documents({
+        pending_requests_count = await question_requests_collection.count_documents({
             "client_id": client_id,
             "status": "pending"
         })
         
         # Get user hits used
-        clients_collection = db.get_collection("clients")
-        client = clients_collection.find_one({"_id": ObjectId(client_id)})
-        user_hits_used = client.get("user_hits_used", 0) if client else 0
+        clients_collection = db.get_async_collection("clients", read_only=True)
+        client = await clients_collection.find_one({"_id": ObjectId(client_id)})
+        user_hits_used = settled_hits_used(client) if client else 0
         
         return {
             "valid_questions_count": valid_questions_count,
@@ -608,36 +758,9 @@ async def get_client_questions(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] != "client":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    questions_collection = db.get_collection("questions")
-    question_stats_collection = db.get_collection("question_stats")
-    
     try:
-        client_id = str(current_user["_id"])
-        
-        # Get questions that have been asked by users, sorted by count in descending order
-        question_stats = list(question_stats_collection.find({"client_id": client_id}).sort("count", -1))
-        
-        # Get question details for questions that have been asked
-        asked_question_ids = [ObjectId(stat["question_id"]) for stat in question_stats if "question_id" in stat]
-        
-        if asked_question_ids:
-            questions = list(questions_collection.find({"_id": {"$in": asked_question_ids}}))
-            
-            # Merge with stats and sort by count
-            question_map = {}
-            for question in questions:
-                stat = next((s for s in question_stats if s.get("question_id") == str(question["_id"])), None)
-                question["asked_count"] = stat["count"] if stat else 0
-                question["_id"] = str(question["_id"])
-                question["client_id"] = str(question["client_id"])
-                question_map[str(question["_id"])] = question
-            
-            # Sort by asked_count in descending order
-            sorted_questions = sorted(question_map.values(), key=lambda x: x.get("asked_count", 0), reverse=True)
-        else:
-            sorted_questions = []
-        
-        return sorted_questions
+        # Questions that have been asked by users, sorted by count in descending order
+        return await get_top_asked_questions(str(current_user["_id"]))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching questions: {str(e)}")
@@ -647,17 +770,17 @@ async def get_requested_questions(current_user: dict = Depends(get_current_user)
     if current_user["user_type"] != "client":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    question_stats_collection = db.get_collection("question_stats")
+    question_stats_collection = db.get_async_collection("question_stats", read_only=True)
     
     try:
         client_id = str(current_user["_id"])
         
         # Get questions that don't exist in the questions collection (requested questions)
         # Sort by count in descending order
-        requested_questions = list(question_stats_collection.find({
+        requested_questions = await question_stats_collection.find({
             "client_id": client_id,
             "question_id": {"$exists": False}
-        }).sort("count", -1))
+        }).sort("count", -1).to_list(None)
         
         for question in requested_questions:
             question["_id"] = str(question["_id"])
@@ -674,15 +797,15 @@ async def client_question_modification_request(request_data: dict, current_user:
     if current_user["user_type"] != "client":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    question_requests_collection = db.get_collection("question_requests")
-    clients_collection = db.get_collection("clients")
+    question_requests_collection = db.get_async_collection("question_requests")
+    clients_collection = db.get_async_collection("clients")
     
     try:
         client_id = str(current_user["_id"])
         website = current_user.get("website", "")
         
         # Get client to check subscription
-        client = clients_collection.find_one({"_id": ObjectId(client_id)})
+        client = await clients_collection.find_one({"_id": ObjectId(client_id)})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -709,18 +832,18 @@ async def client_question_modification_request(request_data: dict, current_user:
             "updated_at": datetime.utcnow()
         }
         
-        result = question_requests_collection.insert_one(question_request)
+        result = await question_requests_collection.insert_one(question_request)
         request_id = str(result.inserted_id)
         
         # Create notification for admins
-        notifications_collection = db.get_collection("notifications")
-        admins_collection = db.get_collection("admins")
+        notifications_collection = db.get_async_collection("notifications")
+        admins_collection = db.get_async_collection("admins")
         admins = admins_collection.find({})
         
         client_name = current_user.get("name", "Unknown Client")
         request_type_display = request_data["request_type"].replace("_", " ").title()
         
-        for admin in admins:
+        async for admin in admins:
             notification = {
                 "user_id": str(admin["_id"]),
                 "user_type": "admin",
@@ -740,13 +863,66 @@ async def client_question_modification_request(request_data: dict, current_user:
                 "is_read": False,
                 "created_at": datetime.utcnow()
             }
-            notifications_collection.insert_one(notification)
+            await notifications_collection.insert_one(notification)
         
         return {"message": f"Question {request_data['request_type']} request submitted successfully", "request_id": request_id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating question modification request: {str(e)}")
 
+def busy_response():
+    """Fast 503 returned when the inference queue is saturated"""
+    return JSONResponse(
+        status_code=503,
+        content={"answer": "TVA is busy right now. Please try again in a moment."},
+        headers={"Retry-After": "1"}
+    )
+
+async def find_best_match(client: dict, question: str):
+    """Resolve a visitor question to a stored one, returning (best_match, match_result)"""
+    client_id = str(client["_id"])
+    questions_version = client.get("questions_version", 0)
+    
+    # Get cached question embeddings for this client, loading them off the event loop on a miss
+    client_questions = question_cache.peek(client_id)
+    if client_questions is not None and client_questions.version < questions_version:
+        # Questions were changed through another worker since this matcher was built
+        question_cache.invalidate(client_id)
+        client_questions = None
+    if client_questions is None:
+        client_questions = await inference_executor.run(question_cache.get, client_id, questions_version)
+    
+    if not len(client_questions):
+        return None, None
+    
+    match_settings = get_match_settings(client)
+    
+    # Literal repeats of a known question are answered without a model call
+    best_match = question_cache.exact_match(
+        client_questions, question, match_settings["threshold"], match_settings["min_margin"]
+    )
+    if best_match is not None:
+        return best_match, None
+    
+    # Ask visitors to retry instead of queueing behind a model that is still loading
+    if not model_provider.ready:
+        model_provider.start_background_load()
+        raise InferenceBusyError("Embedding model is still loading")
+    
+    # Only the visitor question needs encoding, batched with concurrent queries
+    query_embedding = await query_batcher.encode_one(question)
+    
+    # Score against the client's question matrix with its own thresholds
+    match = await inference_executor.run(
+        client_questions.match, query_embedding, **match_settings
+    )
+    if match.is_match:
+        if client_questions.remember(question, match.best.index, match.best.score, match.margin):
+            schedule_question_alias(client_id, question, match.best, match.margin)
+        return match.best, match
+    
+    return None, match
+
 # Enhanced Speech bot endpoint with question tracking
 @app.post("/speechbot/query")
 async def speechbot_query(query_data: dict):
@@ -759,11 +935,8 @@ async def speechbot_query(query_data: dict):
     if not website or not question:
         raise HTTPException(status_code=400, detail="Website and question are required")
     
-    clients_collection = db.get_collection("clients")
-    questions_collection = db.get_collection("questions")
-    question_stats_collection = db.get_collection("question_stats")
-    
-    client = clients_collection.find_one({"website": website})
+    # Slim, process-local client record instead of a full document read per visitor
+    client = await client_directory.get(website)
     if not client:
         return {"answer": "Client not found"}
     
@@ -774,7 +947,7 @@ async def speechbot_query(query_data: dict):
     if current_time > subscription_end:
         return {"answer": "Subscription expired. Please renew your subscription to use TVA."}
     
-    # Check user hits limit - but don't increment yet
+    # Cheap pre-check on the cached counters; the authoritative check happens on consume
     user_hits_used = client.get("user_hits_used", 0)
     user_hits_allowed = client.get("user_hits_allowed", 0)
     
@@ -785,92 +958,45 @@ async def speechbot_query(query_data: dict):
     if not client.get("is_active", True):
         return {"answer": "Account is inactive. Please contact support."}
     
-    # Get all questions for this client
-    client_questions = list(questions_collection.find({"client_id": str(client["_id"])}))
-    
-    if not client_questions:
-        # Track requested question WITHOUT incrementing user hits
-        question_stats_collection.update_one(
-            {
-                "client_id": str(client["_id"]),
-                "question_text": question,
-                "question_id": {"$exists": False}
-            },
-            {
-                "$setOnInsert": {
-                    "client_id": str(client["_id"]),
-                    "website": website,
-                    "question_text": question,
-                    "created_at": datetime.utcnow()
-                },
-                "$inc": {"count": 1}
-            },
-            upsert=True
-        )
-        return {"answer": "I'm sorry, I don't have an answer for that question. Please ask something else."}
-    
-    # Use sentence transformers to find best match
-    questions_text = [q["question"] for q in client_questions]
-    answers = [q["answer"] for q in client_questions]
-    question_ids = [str(q["_id"]) for q in client_questions]
-    
-    # Encode questions and query
-    question_embeddings = model.encode(questions_text)
-    query_embedding = model.encode([question])
-    
-    # Calculate similarities
-    similarities = util.cos_sim(query_embedding, question_embeddings)[0]
-    best_match_idx = similarities.argmax().item()
-    best_similarity = similarities[best_match_idx].item()
-    
-    # Threshold for considering it a match
-    if best_similarity > 0.6:
-        # ONLY INCREMENT USER HITS FOR SUCCESSFUL MATCHES
-        clients_collection.update_one(
-            {"_id": client["_id"]},
-            {"$inc": {"user_hits_used": 1}}
+    # Popular questions are served from the answer cache; usage is still counted below. Keyed by
+    # questions_version too, so answers cached before a question write on another worker are not served
+    answer_key = (website, normalize_question(question), language, client.get("questions_version", 0))
+    best_match = answer_cache.get(answer_key)
+    match = None
+    
+    if best_match is None:
+        try:
+            best_match, match = await find_best_match(client, question)
+        except InferenceBusyError:
+            return busy_response()
+        
+        if best_match is not None:
+            answer_cache.set(answer_key, best_match, tag=str(client["_id"]))
+    
+    if best_match is not None:
+        # ONLY CONSUME USER HITS FOR SUCCESSFUL MATCHES, atomically against the plan limit
+        if not await quota_service.consume(client["_id"]):
+            return {"answer": "User hits limit reached. Please upgrade your plan to continue using TVA."}
+        client_directory.record_hit(client)
+        
+        # Track question usage, written behind in batches
+        question_stats_buffer.record_answered(
+            str(client["_id"]), website, best_match.question_id, best_match.question
         )
         
-        # Track question usage
-        question_stats_collection.update_one(
-            {
-                "client_id": str(client["_id"]),
-                "question_id": question_ids[best_match_idx]
-            },
-            {
-                "$setOnInsert": {
-                    "client_id": str(client["_id"]),
-                    "website": website,
-                    "question_id": question_ids[best_match_idx],
-                    "question_text": questions_text[best_match_idx],
-                    "created_at": datetime.utcnow()
-                },
-                "$inc": {"count": 1}
-            },
-            upsert=True
-        )
-        
-        return {"answer": answers[best_match_idx]}
+        return {"answer": best_match.answer}
     else:
         # Track requested question WITHOUT incrementing user hits
-        question_stats_collection.update_one(
-            {
-                "client_id": str(client["_id"]),
-                "question_text": question,
-                "question_id": {"$exists": False}
-            },
-            {
-                "$setOnInsert": {
-                    "client_id": str(client["_id"]),
-                    "website": website,
-                    "question_text": question,
-                    "created_at": datetime.utcnow()
-                },
-                "$inc": {"count": 1}
-            },
-            upsert=True
-        )
-        return {"answer": "I'm sorry, I don't have an answer for that question. Please ask something else."}
+        question_stats_buffer.record_unanswered(str(client["_id"]), website, question)
+        
+        response = {"answer": "I'm sorry, I don't have an answer for that question. Please ask something else."}
+        if match is not None and match.suggestions:
+            # Close but not confident enough: offer "did you mean" options
+            response["suggestions"] = [
+                {"question_id": c.question_id, "question": c.question, "score": round(c.score, 4)}
+                for c in match.suggestions
+            ]
+        return response
 
 # Admin Question Management endpoints
 @app.post("/admin/questions")
@@ -878,15 +1004,15 @@ async def admin_add_question(question_data: dict, current_user: dict = Depends(g
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    clients_collection = db.get_collection("clients")
-    questions_collection = db.get_collection("questions")
+    clients_collection = db.get_async_collection("clients")
+    questions_collection = db.get_async_collection("questions")
     
     try:
         client_id = question_data.get("client_id")
         if not client_id:
             raise HTTPException(status_code=400, detail="Client ID is required")
         
-        client = clients_collection.find_one({"_id": ObjectId(client_id)})
+        client = await clients_collection.find_one({"_id": ObjectId(client_id)})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -898,7 +1024,7 @@ async def admin_add_question(question_data: dict, current_user: dict = Depends(g
             )
         
         # Check for duplicate question
-        if check_duplicate_question(client_id, question_data["question"]):
+        if await check_duplicate_question(client_id, question_data["question"]):
             raise HTTPException(
                 status_code=400,
                 detail="This question already exists for this client. Please use a different question."
@@ -927,13 +1053,15 @@ async def admin_add_question(question_data: dict, current_user: dict = Depends(g
             "created_by": str(current_user["_id"]),
             "created_at": datetime.utcnow(),
             "updated_by": str(current_user["_id"]),
-            "updated_at": datetime.utcnow()
+            "updated_at": datetime.utcnow(),
+            **await inference_executor.run(question_cache.embedding_fields, question_data["question"])
         }
         
-        result = questions_collection.insert_one(question_entry)
+        result = await questions_collection.insert_one(question_entry)
+        await question_saved(client_id, result.inserted_id, question_entry)
         
         # Update client question count
-        clients_collection.update_one(
+        await clients_collection.update_one(
             {"_id": ObjectId(client_id)},
             {"$inc": {"questions_used": 1}}
         )
@@ -947,7 +1075,7 @@ async def admin_add_question(question_data: dict, current_user: dict = Depends(g
             "details": {"question_id": str(result.inserted_id)},
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Question added successfully for client"}
         
@@ -962,16 +1090,16 @@ async def admin_update_question(question_id: str, question_data: dict, current_u
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    questions_collection = db.get_collection("questions")
-    clients_collection = db.get_collection("clients")
+    questions_collection = db.get_async_collection("questions")
+    clients_collection = db.get_async_collection("clients")
     
     try:
-        question = questions_collection.find_one({"_id": ObjectId(question_id)})
+        question = await questions_collection.find_one({"_id": ObjectId(question_id)})
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
         
         # Get client to check current subscription status
-        client = clients_collection.find_one({"_id": ObjectId(question["client_id"])})
+        client = await clients_collection.find_one({"_id": ObjectId(question["client_id"])})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -986,13 +1114,15 @@ async def admin_update_question(question_id: str, question_data: dict, current_u
             "question": question_data["question"],
             "answer": question_data["answer"],
             "updated_by": str(current_user["_id"]),
-            "updated_at": datetime.utcnow()
+            "updated_at": datetime.utcnow(),
+            **await inference_executor.run(question_cache.embedding_fields, question_data["question"])
         }
         
-        questions_collection.update_one(
+        await questions_collection.update_one(
             {"_id": ObjectId(question_id)},
             {"$set": update_data}
         )
+        await question_saved(question["client_id"], question_id, update_data)
         
         # Create log
         log_entry = {
@@ -1003,7 +1133,7 @@ async def admin_update_question(question_id: str, question_data: dict, current_u
             "details": {"question_id": question_id},
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Question updated successfully"}
         
@@ -1015,20 +1145,20 @@ async def admin_delete_question(question_id: str, current_user: dict = Depends(g
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    questions_collection = db.get_collection("questions")
-    clients_collection = db.get_collection("clients")
+    questions_collection = db.get_async_collection("questions")
+    clients_collection = db.get_async_collection("clients")
     
     try:
         # Validate the question_id format
         if not ObjectId.is_valid(question_id):
             raise HTTPException(status_code=400, detail="Invalid question ID format")
         
-        question = questions_collection.find_one({"_id": ObjectId(question_id)})
+        question = await questions_collection.find_one({"_id": ObjectId(question_id)})
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
         
         # Get client to check subscription status
-        client = clients_collection.find_one({"_id": ObjectId(question["client_id"])})
+        client = await clients_collection.find_one({"_id": ObjectId(question["client_id"])})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -1040,13 +1170,14 @@ async def admin_delete_question(question_id: str, current_user: dict = Depends(g
             )
         
         # Delete the question
-        delete_result = questions_collection.delete_one({"_id": ObjectId(question_id)})
+        delete_result = await questions_collection.delete_one({"_id": ObjectId(question_id)})
         
         if delete_result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Question not found or already deleted")
+        await question_deleted(question["client_id"], question_id)
         
         # Update client question count
-        clients_collection.update_one(
+        await clients_collection.update_one(
             {"_id": ObjectId(question["client_id"])},
             {"$inc": {"questions_used": -1}}
         )
@@ -1060,7 +1191,7 @@ async def admin_delete_question(question_id: str, current_user: dict = Depends(g
             "details": {"question_id": question_id},
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Question deleted successfully"}
         
@@ -1072,13 +1203,13 @@ async def admin_delete_question(question_id: str, current_user: dict = Depends(g
 # Client can only view questions (no add/edit/delete)
 @app.get("/questions")
 async def get_questions(current_user: dict = Depends(get_current_user)):
-    questions_collection = db.get_collection("questions")
+    questions_collection = db.get_async_collection("questions", read_only=True)
     
     try:
         if current_user["user_type"] == "admin":
-            questions = list(questions_collection.find())
+            questions = await questions_collection.find({}, {"embedding": 0}).to_list(None)
         else:  # client
-            questions = list(questions_collection.find({"client_id": str(current_user["_id"])}))
+            questions = await questions_collection.find({"client_id": str(current_user["_id"])}, {"embedding": 0}).to_list(None)
         
         for q in questions:
             q["_id"] = str(q["_id"])
@@ -1102,15 +1233,15 @@ async def create_subscription_order(subscription_data: dict, current_user: dict
         raise HTTPException(status_code=400, detail="Website is required for subscription")
     
     # Verify client owns this website or it's new
-    clients_collection = db.get_collection("clients")
-    existing_client = clients_collection.find_one({
+    clients_collection = db.get_async_collection("clients")
+    existing_client = await clients_collection.find_one({
         "_id": ObjectId(current_user["_id"]),
         "website": website
     })
     
     if not existing_client:
         # Check if website already exists for other clients
-        website_exists = clients_collection.find_one({"website": website})
+        website_exists = await clients_collection.find_one({"website": website})
         if website_exists:
             raise HTTPException(status_code=400, detail="Website already registered by another client")
     
@@ -1146,8 +1277,8 @@ async def create_subscription_order(subscription_data: dict, current_user: dict
 # Enhanced subscription verification to update plan limits using centralized function
 @app.post("/subscription/verify")
 async def verify_subscription(verification_data: dict, current_user: dict = Depends(get_current_user)):
-    clients_collection = db.get_collection("clients")
-    subscriptions_collection = db.get_collection("subscriptions")
+    clients_collection = db.get_async_collection("clients")
+    subscriptions_collection = db.get_async_collection("subscriptions")
     
     try:
         params_dict = {
@@ -1173,7 +1304,7 @@ async def verify_subscription(verification_data: dict, current_user: dict = Depe
             raise HTTPException(status_code=400, detail="Invalid plan")
         
         # Use centralized function to update subscription
-        updated_client = update_client_subscription(
+        updated_client = await update_client_subscription(
             client_id=str(current_user["_id"]),
             new_plan=plan,
             is_new_subscription=True
@@ -1190,7 +1321,7 @@ async def verify_subscription(verification_data: dict, current_user: dict = Depe
             "end_date": updated_client["subscription_end"],
             "created_at": datetime.utcnow()
         }
-        subscriptions_collection.insert_one(subscription)
+        await subscriptions_collection.insert_one(subscription)
         
         # Create log
         log_entry = {
@@ -1205,7 +1336,7 @@ async def verify_subscription(verification_data: dict, current_user: dict = Depe
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Subscription activated successfully"}
     
@@ -1217,10 +1348,10 @@ async def verify_subscription(verification_data: dict, current_user: dict = Depe
 # Enhanced endpoint to get client's current subscription status
 @app.get("/subscription/status")
 async def get_subscription_status(current_user: dict = Depends(get_current_user)):
-    clients_collection = db.get_collection("clients")
+    clients_collection = db.get_async_collection("clients")
     
     try:
-        client = clients_collection.find_one({"_id": ObjectId(current_user["_id"])})
+        client = await clients_collection.find_one({"_id": ObjectId(current_user["_id"])})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -1236,7 +1367,7 @@ async def get_subscription_status(current_user: dict = Depends(get_current_user)
         questions_allowed = plan_limits["questions_allowed"]
         questions_used = client.get("questions_used", 0)
         user_hits_allowed = plan_limits["user_hits_allowed"]
-        user_hits_used = client.get("user_hits_used", 0)
+        user_hits_used = settled_hits_used(client)
         
         subscription_status = {
             "plan": current_plan,
@@ -1267,10 +1398,10 @@ async def sync_client_limits(client_id: str, current_user: dict = Depends(get_cu
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    clients_collection = db.get_collection("clients")
+    clients_collection = db.get_async_collection("clients")
     
     try:
-        client = clients_collection.find_one({"_id": ObjectId(client_id)})
+        client = await clients_collection.find_one({"_id": ObjectId(client_id)})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -1283,10 +1414,12 @@ async def sync_client_limits(client_id: str, current_user: dict = Depends(get_cu
             "user_hits_allowed": plan_limits["user_hits_allowed"]
         }
         
-        clients_collection.update_one(
+        await quota_service.release(client_id)
+        await clients_collection.update_one(
             {"_id": ObjectId(client_id)},
             {"$set": update_data}
         )
+        client_directory.invalidate(client_id)
         
         # Create log
         log_entry = {
@@ -1303,7 +1436,7 @@ async def sync_client_limits(client_id: str, current_user: dict = Depends(get_cu
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {
             "message": "Client limits synced successfully",
@@ -1314,6 +1447,59 @@ async def sync_client_limits(client_id: str, current_user: dict = Depends(get_cu
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error syncing client limits: {str(e)}")
 
+# Admin endpoint to tune per-client matching thresholds
+@app.put("/admin/clients/{client_id}/match-settings")
+async def update_client_match_settings(client_id: str, settings_data: dict, current_user: dict = Depends(get_current_user)):
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    clients_collection = db.get_async_collection("clients")
+    
+    try:
+        update_data = {}
+        for field in ["match_threshold", "suggestion_threshold", "match_min_margin"]:
+            if field in settings_data:
+                value = settings_data[field]
+                if value is not None:
+                    try:
+                        value = None if isinstance(value, bool) else float(value)
+                    except (TypeError, ValueError):
+                        value = None
+                    # NaN fails the range check as well
+                    if value is None or not 0 <= value <= 1:
+                        raise HTTPException(status_code=400, detail=f"{field} must be a number between 0 and 1")
+                update_data[field] = value
+        
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No match settings provided")
+        
+        result = await clients_collection.update_one(
+            {"_id": ObjectId(client_id)},
+            {"$set": update_data}
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Client not found")
+        answer_cache.invalidate_tag(client_id)
+        client_directory.invalidate(client_id)
+        
+        # Create log
+        log_entry = {
+            "action": "update_match_settings",
+            "user_id": str(current_user["_id"]),
+            "user_type": "admin",
+            "client_id": client_id,
+            "details": update_data,
+            "timestamp": datetime.utcnow()
+        }
+        await db.get_async_collection("logs").insert_one(log_entry)
+        
+        return {"message": "Match settings updated successfully", "match_settings": update_data}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating match settings: {str(e)}")
+
 # Add endpoint to get available plans
 @app.get("/subscription/plans")
 async def get_subscription_plans():
@@ -1367,8 +1553,8 @@ async def get_all_clients(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    clients_collection = db.get_collection("clients")
-    clients = list(clients_collection.find())
+    clients_collection = db.get_async_collection("clients", read_only=True)
+    clients = await clients_collection.find().to_list(None)
     
     for client in clients:
         client["_id"] = str(client["_id"])
@@ -1383,8 +1569,8 @@ async def get_all_questions(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    questions_collection = db.get_collection("questions")
-    questions = list(questions_collection.find())
+    questions_collection = db.get_async_collection("questions", read_only=True)
+    questions = await questions_collection.find({}, {"embedding": 0}).to_list(None)
     
     for question in questions:
         question["_id"] = str(question["_id"])
@@ -1396,8 +1582,8 @@ async def get_all_subscriptions(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    subscriptions_collection = db.get_collection("subscriptions")
-    subscriptions = list(subscriptions_collection.find())
+    subscriptions_collection = db.get_async_collection("subscriptions", read_only=True)
+    subscriptions = await subscriptions_collection.find().to_list(None)
     
     for subscription in subscriptions:
         subscription["_id"] = str(subscription["_id"])
@@ -1409,8 +1595,8 @@ async def get_system_logs(limit: int = 100, current_user: dict = Depends(get_cur
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    logs_collection = db.get_collection("logs")
-    logs = list(logs_collection.find().sort("timestamp", -1).limit(limit))
+    logs_collection = db.get_async_collection("logs", read_only=True)
+    logs = await logs_collection.find().sort("timestamp", -1).limit(limit).to_list(None)
     
     for log in logs:
         log["_id"] = str(log["_id"])
@@ -1422,22 +1608,27 @@ async def delete_client(client_id: str, current_user: dict = Depends(get_current
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    clients_collection = db.get_collection("clients")
-    questions_collection = db.get_collection("questions")
-    user_questions_collection = db.get_collection("user_questions")
-    question_requests_collection = db.get_collection("question_requests")
+    clients_collection = db.get_async_collection("clients")
+    questions_collection = db.get_async_collection("questions")
+    user_questions_collection = db.get_async_collection("user_questions")
+    question_requests_collection = db.get_async_collection("question_requests")
     
     # Delete client - Convert string to ObjectId
-    result = clients_collection.delete_one({"_id": ObjectId(client_id)})
+    result = await clients_collection.delete_one({"_id": ObjectId(client_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    client_directory.invalidate(client_id)
+    principal_cache.invalidate(client_id)
+    quota_service.discard(client_id)
     
     # Delete client's questions
-    questions_collection.delete_many({"client_id": client_id})
+    await questions_collection.delete_many({"client_id": client_id})
+    invalidate_client_questions(client_id)
     
     # Delete client's user questions and tracking data
-    user_questions_collection.delete_many({"client_id": client_id})
-    question_requests_collection.delete_many({"client_id": client_id})
+    await user_questions_collection.delete_many({"client_id": client_id})
+    await question_requests_collection.delete_many({"client_id": client_id})
+    await db.get_async_collection("question_aliases").delete_many({"client_id": client_id})
     
     return {"message": "Client and all associated data deleted successfully"}
 
@@ -1446,7 +1637,7 @@ async def search_clients(query: str = "", current_user: dict = Depends(get_curre
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    clients_collection = db.get_collection("clients")
+    clients_collection = db.get_async_collection("clients", read_only=True)
     
     try:
         search_filter = {}
@@ -1460,7 +1651,7 @@ async def search_clients(query: str = "", current_user: dict = Depends(get_curre
                 ]
             }
         
-        clients = list(clients_collection.find(search_filter).limit(50))
+        clients = await clients_collection.find(search_filter).limit(50).to_list(None)
         
         for client in clients:
             client["_id"] = str(client["_id"])
@@ -1475,15 +1666,15 @@ async def search_clients(query: str = "", current_user: dict = Depends(get_curre
 
 
 # Add this function in the main.py file
-def check_duplicate_question(client_id: str, question: str) -> bool:
+async def check_duplicate_question(client_id: str, question: str) -> bool:
     """Check if a question already exists for a client"""
-    questions_collection = db.get_collection("questions")
+    questions_collection = db.get_async_collection("questions")
     
     # Normalize the question for comparison
     normalized_question = question.strip().lower()
     
     # Check for existing questions
-    existing_question = questions_collection.find_one({
+    existing_question = await questions_collection.find_one({
         "client_id": client_id,
         "question": {"$regex": f"^{re.escape(normalized_question)}$", "$options": "i"}
     })
@@ -1502,7 +1693,7 @@ async def admin_update_client_subscription(client_id: str, subscription_data: di
             raise HTTPException(status_code=400, detail="Plan is required")
         
         # Use centralized function to update subscription
-        updated_client = update_client_subscription(
+        updated_client = await update_client_subscription(
             client_id=client_id,
             new_plan=new_plan,
             is_new_subscription=True
@@ -1520,7 +1711,7 @@ async def admin_update_client_subscription(client_id: str, subscription_data: di
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": f"Client subscription updated to {new_plan} successfully"}
         
@@ -1550,13 +1741,13 @@ async def get_client_details(client_id: str, current_user: dict = Depends(get_cu
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    clients_collection = db.get_collection("clients")
-    questions_collection = db.get_collection("questions")
-    subscriptions_collection = db.get_collection("subscriptions")
-    user_questions_collection = db.get_collection("user_questions")
+    clients_collection = db.get_async_collection("clients", read_only=True)
+    questions_collection = db.get_async_collection("questions", read_only=True)
+    subscriptions_collection = db.get_async_collection("subscriptions", read_only=True)
+    user_questions_collection = db.get_async_collection("user_questions", read_only=True)
     
     try:
-        client = clients_collection.find_one({"_id": ObjectId(client_id)})
+        client = await clients_collection.find_one({"_id": ObjectId(client_id)})
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -1565,21 +1756,23 @@ async def get_client_details(client_id: str, current_user: dict = Depends(get_cu
         per_page = 10
         skip = (page - 1) * per_page
         
-        total_questions = questions_collection.count_documents({"client_id": client_id})
-        questions = list(questions_collection.find({"client_id": client_id})
+        total_questions = await questions_collection.count_documents({"client_id": client_id})
+        questions = await (questions_collection.find({"client_id": client_id})
                             .skip(skip)
                             .limit(per_page)
-                            .sort("created_at", -1))
+                            .sort("created_at", -1)
+                            .to_list(None))
         
         # Get user questions stats
-        user_questions = list(user_questions_collection.find({"client_id": client_id}))
+        user_questions = await user_questions_collection.find({"client_id": client_id}).to_list(None)
         total_user_questions = len(user_questions)
         valid_user_questions = len([q for q in user_questions if q.get("is_valid", False)])
         requested_user_questions = len([q for q in user_questions if not q.get("is_valid", False) and not q.get("requested_by_client", False)])
         
         # Get subscription history
-        subscriptions = list(subscriptions_collection.find({"client_id": client_id})
-                            .sort("created_at", -1))
+        subscriptions = await (subscriptions_collection.find({"client_id": client_id})
+                            .sort("created_at", -1)
+                            .to_list(None))
         
         # Prepare response
         client_details = {
@@ -1599,7 +1792,7 @@ async def get_client_details(client_id: str, current_user: dict = Depends(get_cu
                 "questions_allowed": client.get("questions_allowed", 0),
                 "questions_used": client.get("questions_used", 0),
                 "user_hits_allowed": client.get("user_hits_allowed", 0),
-                "user_hits_used": client.get("user_hits_used", 0),
+                "user_hits_used": settled_hits_used(client),
                 "modifications_used": client.get("modifications_used", 0),
                 "is_active": client.get("is_active", True),
                 "created_at": client.get("created_at")
@@ -1648,7 +1841,13 @@ async def sync_all_subscriptions(current_user: dict = Depends(get_current_user))
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        synced_count = sync_all_clients_subscriptions()
+        # Hand this worker's reserved hits back before limits change under them
+        await quota_service.release_all()
+        
+        # Maintenance job on the sync driver, kept off the event loop
+        synced_count = await run_in_threadpool(sync_all_clients_subscriptions)
+        if synced_count:
+            client_directory.clear()
         return {
             "message": f"Successfully synced {synced_count} client subscriptions",
             "synced_count": synced_count
@@ -1662,8 +1861,8 @@ async def create_question_request(request_data: dict, current_user: dict = Depen
     if current_user["user_type"] != "client":
         raise HTTPException(status_code=403, detail="Only clients can create question requests")
     
-    question_requests_collection = db.get_collection("question_requests")
-    notifications_collection = db.get_collection("notifications")
+    question_requests_collection = db.get_async_collection("question_requests")
+    notifications_collection = db.get_async_collection("notifications")
     
     try:
         # Create question request
@@ -1679,17 +1878,17 @@ async def create_question_request(request_data: dict, current_user: dict = Depen
             "updated_at": datetime.utcnow()
         }
         
-        result = question_requests_collection.insert_one(question_request)
+        result = await question_requests_collection.insert_one(question_request)
         request_id = str(result.inserted_id)
         
         # Create notification for all admins
-        admins_collection = db.get_collection("admins")
+        admins_collection = db.get_async_collection("admins")
         admins = admins_collection.find({})
         
         client_name = current_user.get("name", "Unknown Client")
         request_type_display = request_data["request_type"].replace("_", " ").title()
         
-        for admin in admins:
+        async for admin in admins:
             notification = {
                 "user_id": str(admin["_id"]),
                 "user_type": "admin",
@@ -1708,7 +1907,7 @@ async def create_question_request(request_data: dict, current_user: dict = Depen
                 "is_read": False,
                 "created_at": datetime.utcnow()
             }
-            notifications_collection.insert_one(notification)
+            await notifications_collection.insert_one(notification)
         
         # Create log
         log_entry = {
@@ -1722,7 +1921,7 @@ async def create_question_request(request_data: dict, current_user: dict = Depen
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Question request submitted successfully", "request_id": request_id}
         
@@ -1731,14 +1930,14 @@ async def create_question_request(request_data: dict, current_user: dict = Depen
 
 @app.get("/question-requests")
 async def get_question_requests(current_user: dict = Depends(get_current_user)):
-    question_requests_collection = db.get_collection("question_requests")
+    question_requests_collection = db.get_async_collection("question_requests", read_only=True)
     
     try:
         if current_user["user_type"] == "admin":
-            requests = list(question_requests_collection.find().sort("created_at", -1))
+            requests = await question_requests_collection.find().sort("created_at", -1).to_list(None)
         else:
             client_id = str(current_user["_id"])
-            requests = list(question_requests_collection.find({"client_id": client_id}).sort("created_at", -1))
+            requests = await question_requests_collection.find({"client_id": client_id}).sort("created_at", -1).to_list(None)
         
         for req in requests:
             req["_id"] = str(req["_id"])
@@ -1754,13 +1953,13 @@ async def update_question_request(request_id: str, update_data: dict, current_us
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can update question requests")
     
-    question_requests_collection = db.get_collection("question_requests")
-    notifications_collection = db.get_collection("notifications")
-    questions_collection = db.get_collection("questions")
-    user_questions_collection = db.get_collection("user_questions")
+    question_requests_collection = db.get_async_collection("question_requests")
+    notifications_collection = db.get_async_collection("notifications")
+    questions_collection = db.get_async_collection("questions")
+    user_questions_collection = db.get_async_collection("user_questions")
     
     try:
-        request = question_requests_collection.find_one({"_id": ObjectId(request_id)})
+        request = await question_requests_collection.find_one({"_id": ObjectId(request_id)})
         if not request:
             raise HTTPException(status_code=404, detail="Question request not found")
         
@@ -1775,7 +1974,7 @@ async def update_question_request(request_id: str, update_data: dict, current_us
             update_fields["admin_notes"] = update_data["admin_notes"]
         
         # Update the request
-        question_requests_collection.update_one(
+        await question_requests_collection.update_one(
             {"_id": ObjectId(request_id)},
             {"$set": update_fields}
         )
@@ -1791,13 +1990,15 @@ async def update_question_request(request_id: str, update_data: dict, current_us
                 "created_by": str(current_user["_id"]),
                 "created_at": datetime.utcnow(),
                 "updated_by": str(current_user["_id"]),
-                "updated_at": datetime.utcnow()
+                "updated_at": datetime.utcnow(),
+                **await inference_executor.run(question_cache.embedding_fields, request["question"])
             }
             
-            questions_collection.insert_one(question_entry)
+            result = await questions_collection.insert_one(question_entry)
+            await question_saved(request["client_id"], result.inserted_id, question_entry)
             
             # Update user questions to mark as valid
-            user_questions_collection.update_one(
+            await user_questions_collection.update_one(
                 {
                     "client_id": request["client_id"],
                     "question": request["question"]
@@ -1826,7 +2027,7 @@ async def update_question_request(request_id: str, update_data: dict, current_us
                 "is_read": False,
                 "created_at": datetime.utcnow()
             }
-            notifications_collection.insert_one(notification)
+            await notifications_collection.insert_one(notification)
         
         # Create log
         log_entry = {
@@ -1841,7 +2042,7 @@ async def update_question_request(request_id: str, update_data: dict, current_us
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Question request updated successfully"}
         
@@ -1857,8 +2058,8 @@ async def get_admin_question_requests(
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    question_requests_collection = db.get_collection("question_requests")
-    question_stats_collection = db.get_collection("question_stats")
+    question_requests_collection = db.get_async_collection("question_requests", read_only=True)
+    question_stats_collection = db.get_async_collection("question_stats", read_only=True)
     
     try:
         # Build query based on status
@@ -1866,7 +2067,7 @@ async def get_admin_question_requests(
         if status != "all":
             query["status"] = status
         
-        requests = list(question_requests_collection.find(query).sort("created_at", -1))
+        requests = await question_requests_collection.find(query).sort("created_at", -1).to_list(None)
         
         # Enhance requests with asked_count from question_stats
         for request in requests:
@@ -1875,7 +2076,7 @@ async def get_admin_question_requests(
             
             # Get asked count from question_stats
             if request.get("question"):
-                stats = question_stats_collection.find_one({
+                stats = await question_stats_collection.find_one({
                     "client_id": request["client_id"],
                     "question_text": request["question"]
                 })
@@ -1898,15 +2099,15 @@ async def revert_question_request(
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    question_requests_collection = db.get_collection("question_requests")
-    questions_collection = db.get_collection("questions")
-    clients_collection = db.get_collection("clients")
-    question_stats_collection = db.get_collection("question_stats")
-    notifications_collection = db.get_collection("notifications")
+    question_requests_collection = db.get_async_collection("question_requests")
+    questions_collection = db.get_async_collection("questions")
+    clients_collection = db.get_async_collection("clients")
+    question_stats_collection = db.get_async_collection("question_stats")
+    notifications_collection = db.get_async_collection("notifications")
     
     try:
         # Find the request
-        request = question_requests_collection.find_one({"_id": ObjectId(request_id)})
+        request = await question_requests_collection.find_one({"_id": ObjectId(request_id)})
         if not request:
             raise HTTPException(status_code=404, detail="Question request not found")
         
@@ -1921,20 +2122,22 @@ async def revert_question_request(
             # Delete the added question
             if request.get("added_question_id"):
                 # Find and delete the question
-                question_to_delete = questions_collection.find_one({"_id": ObjectId(request["added_question_id"])})
+                question_to_delete = await questions_collection.find_one({"_id": ObjectId(request["added_question_id"])})
                 if question_to_delete:
                     # Delete the question
-                    delete_result = questions_collection.delete_one({"_id": ObjectId(request["added_question_id"])})
+                    delete_result = await questions_collection.delete_one({"_id": ObjectId(request["added_question_id"])})
                     
                     if delete_result.deleted_count > 0:
+                        await question_deleted(request["client_id"], request["added_question_id"])
+                        
                         # Update client question count
-                        clients_collection.update_one(
+                        await clients_collection.update_one(
                             {"_id": ObjectId(request["client_id"])},
                             {"$inc": {"questions_used": -1}}
                         )
                         
                         # Remove question_id from question_stats
-                        question_stats_collection.update_one(
+                        await question_stats_collection.update_one(
                             {
                                 "client_id": request["client_id"],
                                 "question_id": request["added_question_id"]
@@ -1953,17 +2156,18 @@ async def revert_question_request(
             # For now, we'll just update the request status
             if request.get("original_question") and request.get("original_answer"):
                 # Revert to original question and answer
-                questions_collection.update_one(
+                reverted_question = {
+                    "question": request["original_question"],
+                    "answer": request["original_answer"],
+                    "updated_by": str(current_user["_id"]),
+                    "updated_at": datetime.utcnow(),
+                    **await inference_executor.run(question_cache.embedding_fields, request["original_question"])
+                }
+                await questions_collection.update_one(
                     {"_id": ObjectId(request["question_id"])},
-                    {
-                        "$set": {
-                            "question": request["original_question"],
-                            "answer": request["original_answer"],
-                            "updated_by": str(current_user["_id"]),
-                            "updated_at": datetime.utcnow()
-                        }
-                    }
+                    {"$set": reverted_question}
                 )
+                await question_saved(request["client_id"], request["question_id"], reverted_question)
                 print(f"✅ Reverted modified question to original values")
             
         elif request["request_type"] == "delete":
@@ -1982,18 +2186,20 @@ async def revert_question_request(
                     "updated_at": datetime.utcnow(),
                     "restored_from_request": request_id
                 }
+                restored_question.update(await inference_executor.run(question_cache.embedding_fields, restored_question["question"]))
                 
-                result = questions_collection.insert_one(restored_question)
+                result = await questions_collection.insert_one(restored_question)
                 restored_question_id = str(result.inserted_id)
+                await question_saved(request["client_id"], restored_question_id, restored_question)
                 
                 # Update client question count
-                clients_collection.update_one(
+                await clients_collection.update_one(
                     {"_id": ObjectId(request["client_id"])},
                     {"$inc": {"questions_used": 1}}
                 )
                 
                 # Restore question_id in question_stats if it exists
-                question_stats_collection.update_one(
+                await question_stats_collection.update_one(
                     {
                         "client_id": request["client_id"],
                         "question_text": original_data.get("question", request["question"])
@@ -2019,13 +2225,13 @@ async def revert_question_request(
             "reverted_at": datetime.utcnow()
         }
         
-        question_requests_collection.update_one(
+        await question_requests_collection.update_one(
             {"_id": ObjectId(request_id)},
             {"$set": update_data}
         )
         
         # Create notification for the client
-        client = clients_collection.find_one({"_id": ObjectId(request["client_id"])})
+        client = await clients_collection.find_one({"_id": ObjectId(request["client_id"])})
         client_name = client["name"] if client else "Unknown Client"
         
         notification = {
@@ -2047,7 +2253,7 @@ async def revert_question_request(
             "is_read": False,
             "created_at": datetime.utcnow()
         }
-        notifications_collection.insert_one(notification)
+        await notifications_collection.insert_one(notification)
         
         # Create log entry
         log_entry = {
@@ -2064,7 +2270,7 @@ async def revert_question_request(
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": "Question request reverted successfully"}
         
@@ -2082,15 +2288,15 @@ async def process_admin_question_request(
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    question_requests_collection = db.get_collection("question_requests")
-    questions_collection = db.get_collection("questions")
-    clients_collection = db.get_collection("clients")
-    question_stats_collection = db.get_collection("question_stats")
-    notifications_collection = db.get_collection("notifications")
+    question_requests_collection = db.get_async_collection("question_requests")
+    questions_collection = db.get_async_collection("questions")
+    clients_collection = db.get_async_collection("clients")
+    question_stats_collection = db.get_async_collection("question_stats")
+    notifications_collection = db.get_async_collection("notifications")
     
     try:
         # Find the request
-        request = question_requests_collection.find_one({"_id": ObjectId(request_id)})
+        request = await question_requests_collection.find_one({"_id": ObjectId(request_id)})
         if not request:
             raise HTTPException(status_code=404, detail="Question request not found")
         
@@ -2113,7 +2319,7 @@ async def process_admin_question_request(
         if status == "approved":
             if request["request_type"] == "add":
                 # Check client's question limit
-                client = clients_collection.find_one({"_id": ObjectId(request["client_id"])})
+                client = await clients_collection.find_one({"_id": ObjectId(request["client_id"])})
                 if not client:
                     raise HTTPException(status_code=404, detail="Client not found")
                 
@@ -2127,7 +2333,7 @@ async def process_admin_question_request(
                     )
                 
                 # Check for duplicate question
-                if check_duplicate_question(request["client_id"], request["question"]):
+                if await check_duplicate_question(request["client_id"], request["question"]):
                     raise HTTPException(
                         status_code=400,
                         detail="This question already exists for this client. Please use a different question."
@@ -2144,20 +2350,22 @@ async def process_admin_question_request(
                     "updated_by": str(current_user["_id"]),
                     "updated_at": datetime.utcnow(),
                     "from_request": True,
-                    "original_request_id": request_id
+                    "original_request_id": request_id,
+                    **await inference_executor.run(question_cache.embedding_fields, request["question"])
                 }
                 
-                result = questions_collection.insert_one(question_data)
+                result = await questions_collection.insert_one(question_data)
                 question_id = str(result.inserted_id)
+                await question_saved(request["client_id"], question_id, question_data)
                 
                 # Update client's question count
-                clients_collection.update_one(
+                await clients_collection.update_one(
                     {"_id": ObjectId(request["client_id"])},
                     {"$inc": {"questions_used": 1}}
                 )
                 
                 # Update question_stats to link the question_id
-                question_stats_collection.update_one(
+                await question_stats_collection.update_one(
                     {
                         "client_id": request["client_id"],
                         "question_text": request["question"],
@@ -2179,27 +2387,28 @@ async def process_admin_question_request(
                     raise HTTPException(status_code=400, detail="Question ID required for modification")
                 
                 # Get original question data before modification
-                original_question = questions_collection.find_one({"_id": ObjectId(request["question_id"])})
+                original_question = await questions_collection.find_one({"_id": ObjectId(request["question_id"])})
                 if original_question:
                     update_data["original_question"] = original_question.get("question")
                     update_data["original_answer"] = original_question.get("answer")
                 
                 # Update the question
-                questions_collection.update_one(
+                modified_question = {
+                    "question": request["question"],
+                    "answer": request["answer"],
+                    "updated_by": str(current_user["_id"]),
+                    "updated_at": datetime.utcnow(),
+                    "last_modified_from_request": request_id,
+                    **await inference_executor.run(question_cache.embedding_fields, request["question"])
+                }
+                await questions_collection.update_one(
                     {"_id": ObjectId(request["question_id"])},
-                    {
-                        "$set": {
-                            "question": request["question"],
-                            "answer": request["answer"],
-                            "updated_by": str(current_user["_id"]),
-                            "updated_at": datetime.utcnow(),
-                            "last_modified_from_request": request_id
-                        }
-                    }
+                    {"$set": modified_question}
                 )
+                await question_saved(request["client_id"], request["question_id"], modified_question)
                 
                 # Increment client's modification count
-                clients_collection.update_one(
+                await clients_collection.update_one(
                     {"_id": ObjectId(request["client_id"])},
                     {"$inc": {"modifications_used": 1}}
                 )
@@ -2210,7 +2419,7 @@ async def process_admin_question_request(
                     raise HTTPException(status_code=400, detail="Question ID required for deletion")
                 
                 # Get original question data before deletion
-                original_question = questions_collection.find_one({"_id": ObjectId(request["question_id"])})
+                original_question = await questions_collection.find_one({"_id": ObjectId(request["question_id"])})
                 if original_question:
                     update_data["original_question_data"] = {
                         "question": original_question.get("question"),
@@ -2220,10 +2429,11 @@ async def process_admin_question_request(
                     }
                 
                 # Delete the question
-                questions_collection.delete_one({"_id": ObjectId(request["question_id"])})
+                await questions_collection.delete_one({"_id": ObjectId(request["question_id"])})
+                await question_deleted(request["client_id"], request["question_id"])
                 
                 # Update client's question count and increment modification count
-                clients_collection.update_one(
+                await clients_collection.update_one(
                     {"_id": ObjectId(request["client_id"])},
                     {
                         "$inc": {
@@ -2234,13 +2444,13 @@ async def process_admin_question_request(
                 )
         
         # Update the request
-        question_requests_collection.update_one(
+        await question_requests_collection.update_one(
             {"_id": ObjectId(request_id)},
             {"$set": update_data}
         )
         
         # Create notification for the client
-        client = clients_collection.find_one({"_id": ObjectId(request["client_id"])})
+        client = await clients_collection.find_one({"_id": ObjectId(request["client_id"])})
         client_name = client["name"] if client else "Unknown Client"
         
         notification = {
@@ -2262,7 +2472,7 @@ async def process_admin_question_request(
             "is_read": False,
             "created_at": datetime.utcnow()
         }
-        notifications_collection.insert_one(notification)
+        await notifications_collection.insert_one(notification)
         
         # Create log
         log_entry = {
@@ -2278,24 +2488,64 @@ async def process_admin_question_request(
             },
             "timestamp": datetime.utcnow()
         }
-        db.get_collection("logs").insert_one(log_entry)
+        await db.get_async_collection("logs").insert_one(log_entry)
         
         return {"message": f"Question request {status} successfully"}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing question request: {str(e)}")
 
+# Admin endpoint to inspect the model, question matching and the query embedding batcher
+@app.get("/admin/inference/stats")
+async def get_inference_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "model": model_provider.status(),
+        "question_cache": question_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "query_batcher": query_batcher.stats(),
+        "executor": inference_executor.stats()
+    }
+
+# Admin endpoint for the caches and background workers outside the inference path
+@app.get("/admin/stats")
+async def get_service_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "client_directory": client_directory.stats(),
+        "principal_cache": principal_cache.stats(),
+        "quota": quota_service.stats(),
+        "question_stats_buffer": question_stats_buffer.stats(),
+        "prewarm": answer_prewarmer.stats(),
+        "tts_cache": tts_cache.stats(),
+        "translations": translation_service.stats(),
+        "email_outbox": email_outbox.stats(),
+        "expiry_reminders": expiry_reminder_job.stats()
+    }
+
+# Admin endpoint to size the MongoDB connection pools under load
+@app.get("/admin/db/pool-stats")
+async def get_db_pool_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return db.pool_stats()
+
 # Admin endpoint to get question stats
 @app.get("/admin/question-stats")
 async def get_admin_question_stats(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    question_stats_collection = db.get_collection("question_stats")
+    question_stats_collection = db.get_async_collection("question_stats", read_only=True)
     
     try:
         # Get all question stats
-        stats = list(question_stats_collection.find().sort("count", -1))
+        stats = await question_stats_collection.find().sort("count", -1).to_list(None)
         
         for stat in stats:
             stat["_id"] = str(stat["_id"])
@@ -2308,15 +2558,15 @@ async def get_admin_question_stats(current_user: dict = Depends(get_current_user
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching question stats: {str(e)}")
 
-# Notification endpoints
+# Notification endpoints; polled often, so the user check is served from the principal cache
 @app.get("/notifications")
 async def get_notifications(current_user: dict = Depends(get_current_user)):
-    notifications_collection = db.get_collection("notifications")
+    notifications_collection = db.get_async_collection("notifications")
     
     try:
-        notifications = list(notifications_collection.find({
+        notifications = await notifications_collection.find({
             "user_id": str(current_user["_id"])
-        }).sort("created_at", -1).limit(50))
+        }).sort("created_at", -1).limit(50).to_list(None)
         
         for notification in notifications:
             notification["_id"] = str(notification["_id"])
@@ -2328,13 +2578,13 @@ async def get_notifications(current_user: dict = Depends(get_current_user)):
 
 @app.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: dict = Depends(get_current_user)):
-    notifications_collection = db.get_collection("notifications")
+    notifications_collection = db.get_async_collection("notifications")
     
     try:
         print(f"🔍 Marking notification as read - ID: {notification_id}, User: {current_user['_id']}")
         
         # Verify the notification exists and belongs to the current user
-        notification = notifications_collection.find_one({
+        notification = await notifications_collection.find_one({
             "_id": ObjectId(notification_id),
             "user_id": str(current_user["_id"])
         })
@@ -2351,7 +2601,7 @@ async def mark_notification_read(notification_id: str, current_user: dict = Depe
             return {"message": "Notification was already read"}
         
         # Update the notification if not already read
-        result = notifications_collection.update_one(
+        result = await notifications_collection.update_one(
             {"_id": ObjectId(notification_id)},
             {"$set": {"is_read": True}}
         )
@@ -2374,10 +2624,10 @@ async def mark_notification_read(notification_id: str, current_user: dict = Depe
         
 @app.get("/notifications/unread-count")
 async def get_unread_notifications_count(current_user: dict = Depends(get_current_user)):
-    notifications_collection = db.get_collection("notifications")
+    notifications_collection = db.get_async_collection("notifications")
     
     try:
-        count = notifications_collection.count_documents({
+        count = await notifications_collection.count_documents({
             "user_id": str(current_user["_id"]),
             "is_read": False
         })
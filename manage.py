@@ -0,0 +1,86 @@
+"""Maintenance commands that should not run on every API worker boot.
+
+    python manage.py migrate                # collections, indexes, data migration, subscription sync
+    python manage.py schema-version
+    python manage.py sync-subscriptions
+    python manage.py backfill-embeddings
+    python manage.py send-expiry-reminders --days 3 --dry-run
+"""
+import argparse
+import sys
+from database import db, SCHEMA_VERSION
+
+
+def migrate(args):
+    from plans import sync_all_clients_subscriptions
+
+    db.migrate()
+    print("🔄 Syncing all client subscriptions...")
+    synced_count = sync_all_clients_subscriptions()
+    print(f"✅ Synced {synced_count} client subscriptions")
+    return 0
+
+
+def schema_version(args):
+    version = db.get_schema_version()
+    print(f"Database schema version: {version} (code expects {SCHEMA_VERSION})")
+    return 0 if version >= SCHEMA_VERSION else 1
+
+
+def sync_subscriptions(args):
+    from plans import sync_all_clients_subscriptions
+
+    synced_count = sync_all_clients_subscriptions()
+    print(f"✅ Synced {synced_count} client subscriptions")
+    return 0
+
+
+def backfill_embeddings(args):
+    from model_provider import model_provider
+    from question_cache import QuestionEmbeddingCache
+
+    cache = QuestionEmbeddingCache(model_provider, model_provider.embedding_id)
+    print(f"🔄 Backfilling question embeddings for {model_provider.embedding_id} ({model_provider.backend})...")
+    count = cache.backfill(batch_size=args.batch_size)
+    print(f"✅ Embedded {count} questions")
+    return 0
+
+
+def send_expiry_reminders(args):
+    from expiry_reminders import expiry_reminder_job
+
+    report = expiry_reminder_job.run(days=args.days, rate=args.rate, dry_run=args.dry_run)
+    print(f"Candidates: {report['candidates']}, duplicates: {report['duplicates']}, "
+          f"claimed by another run: {report['claimed_elsewhere']}")
+    print(f"Rendered {report['rendered']} emails in {report['render_seconds']}s")
+    print(f"Sent {report['sent']}, failed {report['failed']} at {report['emails_per_second']} emails/s "
+          f"over {report['smtp_connects']} SMTP connection(s)")
+    for failure in report["failures"]:
+        print(f"  ❌ {failure['email']} ({failure['client_id']}): {failure['error']}")
+    return 1 if report["failed"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="Apply migrations and record the schema version").set_defaults(func=migrate)
+    commands.add_parser("schema-version", help="Show the recorded schema version").set_defaults(func=schema_version)
+    commands.add_parser("sync-subscriptions", help="Re-apply plan limits to all clients").set_defaults(func=sync_subscriptions)
+
+    backfill = commands.add_parser("backfill-embeddings", help="Store embeddings for questions missing them")
+    backfill.add_argument("--batch-size", type=int, default=64)
+    backfill.set_defaults(func=backfill_embeddings)
+
+    reminders = commands.add_parser("send-expiry-reminders", help="Email clients whose subscription ends soon")
+    reminders.add_argument("--days", type=int, default=None, help="Look-ahead window (EXPIRY_REMINDER_DAYS)")
+    reminders.add_argument("--rate", type=float, default=None, help="Emails per second (EXPIRY_REMINDER_RATE)")
+    reminders.add_argument("--dry-run", action="store_true", help="Query and render without sending")
+    reminders.set_defaults(func=send_expiry_reminders)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+from dotenv import load_dotenv
+from ann_index import ANN_MIN_QUESTIONS, build_index
+
+load_dotenv()
+
+DEFAULT_MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", 0.6))
+DEFAULT_SUGGESTION_THRESHOLD = float(os.getenv("SUGGESTION_THRESHOLD", 0.45))
+DEFAULT_MIN_MARGIN = float(os.getenv("MATCH_MIN_MARGIN", 0.0))
+DEFAULT_TOP_K = int(os.getenv("MATCH_TOP_K", 3))
+EXACT_INDEX_MAX_LEARNED = int(os.getenv("EXACT_INDEX_MAX_LEARNED", 1000))
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so literal repeats compare equal"""
+    text = "".join(
+        " " if unicodedata.category(char).startswith("P") else char
+        for char in text.lower()
+    )
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def get_match_settings(client: dict) -> dict:
+    """Matching thresholds for a client, falling back to the global defaults"""
+    def setting(field, default):
+        value = client.get(field)
+        return default if value is None else float(value)
+
+    return {
+        "threshold": setting("match_threshold", DEFAULT_MATCH_THRESHOLD),
+        "suggestion_threshold": setting("suggestion_threshold", DEFAULT_SUGGESTION_THRESHOLD),
+        "min_margin": setting("match_min_margin", DEFAULT_MIN_MARGIN)
+    }
+
+
+class MatchCandidate:
+    def __init__(self, index, question_id, question, answer, score):
+        self.index = index
+        self.question_id = question_id
+        self.question = question
+        self.answer = answer
+        self.score = score
+
+
+class MatchResult:
+    def __init__(self, candidates, best, margin, is_match, suggestions):
+        self.candidates = candidates
+        self.best = best
+        self.margin = margin
+        self.is_match = is_match
+        self.suggestions = suggestions
+
+
+class QuestionMatcher:
+    """Scores a normalized query vector against a client's normalized question matrix"""
+
+    def __init__(self, question_ids, questions, answers, embeddings, aliases=None, version: int = 0):
+        self.question_ids = list(question_ids)
+        self.questions = list(questions)
+        self.answers = list(answers)
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.positions = {question_id: idx for idx, question_id in enumerate(self.question_ids)}
+        # Rows of deleted questions stay in place so row numbers in the exact and ANN indexes remain valid
+        self.deleted = set()
+        # The client's questions_version this matcher reflects; workers rebuild once MongoDB has moved past it
+        self.version = version
+        self._write_lock = threading.Lock()
+
+        # Normalized text -> (row, score, margin). Stored questions have no score and always match;
+        # visitor phrasings learned from semantic matches keep theirs, so they obey later threshold changes
+        self.exact_index = {}
+        self.learned = 0
+        for query, question_id, score, margin in (aliases or []):
+            if self.learned >= EXACT_INDEX_MAX_LEARNED:
+                break
+            if question_id in self.positions:
+                self.exact_index[query] = (self.positions[question_id], score, margin)
+                self.learned += 1
+        for idx, text in enumerate(self.questions):
+            self.exact_index[normalize_question(text)] = (idx, None, None)
+
+        # Large clients are searched through an approximate index instead of scoring every row
+        self.index = build_index(np.arange(len(self.question_ids)), self.embeddings) if len(self.question_ids) else None
+
+    def __len__(self):
+        return len(self.question_ids) - len(self.deleted)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """True once deleted rows make up a large share of the matrix"""
+        return len(self.deleted) > max(64, len(self.question_ids) // 2)
+
+    def upsert(self, question_id: str, question: str, answer: str, embedding):
+        """Add a question, or replace the text, answer and vector of an existing one, in place"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._write_lock:
+            idx = self.positions.get(question_id)
+            if idx is None:
+                idx = len(self.question_ids)
+                # Lists grow before the matrix, so any row a reader can score already has its text
+                self.question_ids.append(question_id)
+                self.questions.append(question)
+                self.answers.append(answer)
+                self.embeddings = np.vstack([self.embeddings.reshape(-1, len(embedding)), embedding[None, :]])
+                self.positions[question_id] = idx
+            else:
+                self._drop_exact(idx)
+                self.questions[idx] = question
+                self.answers[idx] = answer
+                self.embeddings[idx] = embedding
+            self.exact_index[normalize_question(question)] = (idx, None, None)
+
+            if self.index is not None and not self.index.full:
+                self.index.add(idx, embedding)
+            elif self.index is not None or len(self) >= ANN_MIN_QUESTIONS:
+                self._rebuild_index()
+
+    def remove(self, question_id: str):
+        """Retire a deleted question's row"""
+        with self._write_lock:
+            idx = self.positions.pop(question_id, None)
+            if idx is None:
+                return
+            self._drop_exact(idx)
+            # Replaced rather than mutated, as scoring threads iterate it
+            self.deleted = self.deleted | {idx}
+            if self.index is not None:
+                self.index.remove(idx)
+
+    def _drop_exact(self, idx: int):
+        # Phrasings learned for the old text may no longer fit the question
+        for key in [key for key, entry in self.exact_index.items() if entry[0] == idx]:
+            del self.exact_index[key]
+
+    def _rebuild_index(self):
+        rows = np.array([idx for idx in range(len(self.question_ids)) if idx not in self.deleted], dtype=np.int64)
+        self.index = build_index(rows, self.embeddings[rows]) if len(rows) else None
+
+    def exact_match(self, text: str, threshold: float = DEFAULT_MATCH_THRESHOLD,
+                    min_margin: float = DEFAULT_MIN_MARGIN):
+        """Return the candidate whose normalized text equals the query, without scoring"""
+        entry = self.exact_index.get(normalize_question(text))
+        if entry is None:
+            return None
+        idx, score, margin = entry
+        if score is None:
+            score = 1.0
+        elif score <= threshold or margin < min_margin:
+            # Learned under looser settings than the client's current ones; let semantic matching decide
+            return None
+        return MatchCandidate(idx, self.question_ids[idx], self.questions[idx], self.answers[idx], score)
+
+    def remember(self, text: str, idx: int, score: float, margin: float) -> bool:
+        """Record a visitor phrasing that semantic matching resolved to row idx, returning True if it is new"""
+        key = normalize_question(text)
+        with self._write_lock:
+            if key in self.exact_index or self.learned >= EXACT_INDEX_MAX_LEARNED or idx in self.deleted:
+                return False
+            self.exact_index[key] = (idx, score, margin)
+            self.learned += 1
+        return True
+
+    def scores(self, query_embedding):
+        # Rows and query are unit length, so one matrix-vector product gives every cosine similarity
+        scores = self.embeddings @ np.asarray(query_embedding, dtype=np.float32)
+        deleted = self.deleted
+        if deleted:
+            scores[list(deleted)] = -np.inf
+        return scores
+
+    def top_k(self, query_embedding, k: int = DEFAULT_TOP_K):
+        """Return up to k candidates ordered by descending score"""
+        if not len(self):
+            return []
+
+        index = self.index
+        if index is not None:
+            top, top_scores = index.search(query_embedding, k)
+            # Defence in depth: a deleted question must never be answered, whatever the index returns
+            deleted = self.deleted
+            if deleted:
+                keep = [position for position, idx in enumerate(top) if int(idx) not in deleted]
+                top, top_scores = top[keep], top_scores[keep]
+        else:
+            scores = self.scores(query_embedding)
+            k = min(k, len(self))
+            if k < len(scores):
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)[:k]
+            top_scores = scores[top]
+
+        return [
+            MatchCandidate(int(idx), self.question_ids[idx], self.questions[idx], self.answers[idx], float(score))
+            for idx, score in zip(top, top_scores)
+        ]
+
+    def match(self, query_embedding, threshold: float = DEFAULT_MATCH_THRESHOLD,
+              suggestion_threshold: float = DEFAULT_SUGGESTION_THRESHOLD,
+              min_margin: float = DEFAULT_MIN_MARGIN, k: int = DEFAULT_TOP_K) -> MatchResult:
+        candidates = self.top_k(query_embedding, k)
+        if not candidates:
+            return MatchResult([], None, 0.0, False, [])
+
+        best = candidates[0]
+        margin = best.score - candidates[1].score if len(candidates) > 1 else best.score
+        is_match = best.score > threshold and margin >= min_margin
+
+        suggestions = []
+        if not is_match:
+            suggestions = [c for c in candidates if c.score >= suggestion_threshold]
+
+        return MatchResult(candidates, best, margin, is_match, suggestions)
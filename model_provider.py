@@ -0,0 +1,129 @@
+import gc
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from question_cache import EMBEDDING_MODEL
+from embedding_backends import EMBEDDING_BACKEND, get_embedding_id, load_backend
+
+load_dotenv()
+
+WARMUP_TEXTS = [
+    "What are your timings?",
+    "How can I contact customer support for my order?",
+    "Do you offer refunds if the product arrives damaged or is not what I ordered?"
+]
+
+
+class ModelProvider:
+    """Loads the sentence embedding model once per process, lazily or in the background, and warms it up"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, backend: str = None, warmup_batch_size: int = None):
+        self.model_name = model_name
+        self.backend = backend or EMBEDDING_BACKEND
+        self.embedding_id = get_embedding_id(self.model_name, self.backend)
+        self.warmup_batch_size = warmup_batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+        self._model = None
+        self._lock = threading.Lock()
+        # Separate from _lock, which is held for the whole load; callers on the event loop only ever take this one
+        self._loader_lock = threading.Lock()
+        self._loader = None
+        self._warmed_up = threading.Event()
+
+        self.state = "not_loaded"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.preloaded = False
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None and self._warmed_up.is_set()
+
+    def get(self):
+        """Return the model, loading it in the calling thread if nothing has loaded it yet"""
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            if self._model is None:
+                self._load()
+            return self._model
+
+    def encode(self, texts):
+        """Encode texts into a normalized float32 matrix with the configured backend"""
+        return self.get().encode(texts)
+
+    def _load(self):
+        self.state = "loading"
+        started = time.perf_counter()
+        try:
+            # Backends import sentence_transformers themselves, so the web process binds its port first
+            model = load_backend(self.model_name, self.backend)
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"❌ Error loading embedding model {self.model_name} ({self.backend}): {e}")
+            raise
+        self.load_seconds = round(time.perf_counter() - started, 3)
+        self._model = model
+        self.state = "loaded"
+        print(f"✅ Loaded embedding model {self.model_name} ({self.backend}) in {self.load_seconds}s")
+
+    def warmup(self):
+        """Run throwaway encodes so the first visitor query does not pay for allocation and kernel setup"""
+        if self._warmed_up.is_set():
+            return
+        model = self.get()
+        started = time.perf_counter()
+        # A single query and a full batch, the two shapes the query batcher produces most
+        model.encode(WARMUP_TEXTS[:1])
+        model.encode((WARMUP_TEXTS * self.warmup_batch_size)[:self.warmup_batch_size])
+        self.warmup_seconds = round(time.perf_counter() - started, 3)
+        self._warmed_up.set()
+        self.state = "ready"
+        print(f"✅ Embedding model warmed up in {self.warmup_seconds}s")
+
+    def preload(self):
+        """Load in the parent process before workers fork, so they share the weights copy-on-write"""
+        self.get()
+        self.preloaded = True
+        # Keep the garbage collector from touching (and so copying) the preloaded objects in each worker
+        gc.freeze()
+
+    def start_background_load(self):
+        """Load and warm up on a background thread; the server keeps answering in the meantime"""
+        with self._loader_lock:
+            if self._loader is not None or self._warmed_up.is_set():
+                return
+            self._loader = threading.Thread(target=self._background_load, name="model-loader", daemon=True)
+            self._loader.start()
+
+    def _background_load(self):
+        try:
+            self.warmup()
+        except Exception as e:
+            print(f"❌ Embedding model warmup failed: {e}")
+        finally:
+            with self._loader_lock:
+                self._loader = None
+
+    def status(self) -> dict:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "embedding_id": self.embedding_id,
+            "state": self.state,
+            "ready": self.ready,
+            "preloaded": self.preloaded,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error
+        }
+
+
+model_provider = ModelProvider()
+
+# With `gunicorn --preload`, main.py is imported once in the master, so this loads the model before fork
+if os.getenv("EMBEDDING_PRELOAD", "false").lower() == "true":
+    model_provider.preload()
@@ -85,6 +85,9 @@ class Client(BaseModel):
     user_hits_used: int = 0
     modifications_allowed: int = 0
     modifications_used: int = 0
+    match_threshold: Optional[float] = None
+    suggestion_threshold: Optional[float] = None
+    match_min_margin: Optional[float] = None
     is_active: bool = True
     created_at: datetime
 
@@ -0,0 +1,70 @@
+from database import db
+
+PLAN_LIMITS = {
+    "trial": {
+        "questions_allowed": 5,
+        "user_hits_allowed": 50,
+        "duration_days": 2
+    },
+    "monthly": {
+        "questions_allowed": 15,
+        "user_hits_allowed": 100,
+        "duration_days": 30
+    },
+    "quarterly": {
+        "questions_allowed": 70,
+        "user_hits_allowed": 400,
+        "duration_days": 90
+    },
+    "yearly": {
+        "questions_allowed": 150,
+        "user_hits_allowed": 1200,
+        "duration_days": 365
+    }
+}
+
+# Helper function to get plan limits
+def get_plan_limits(plan):
+    """Get the limits for each subscription plan"""
+    return PLAN_LIMITS.get(plan, PLAN_LIMITS["trial"])
+
+# Function to sync subscription limits for all clients
+def sync_all_clients_subscriptions():
+    """Sync subscription limits for all clients based on their current plan"""
+    clients_collection = db.get_collection("clients")
+
+    try:
+        synced_count = 0
+
+        # One update_many per plan instead of one update_one per client
+        plan_filters = {plan: {"subscription_plan": plan} for plan in PLAN_LIMITS if plan != "trial"}
+        # Missing or unknown plans are treated as trial, as get_plan_limits does
+        plan_filters["trial"] = {"subscription_plan": {"$nin": [plan for plan in PLAN_LIMITS if plan != "trial"]}}
+
+        for plan, plan_filter in plan_filters.items():
+            plan_limits = PLAN_LIMITS[plan]
+            result = clients_collection.update_many(
+                {
+                    **plan_filter,
+                    "$or": [
+                        {"questions_allowed": {"$ne": plan_limits["questions_allowed"]}},
+                        {"user_hits_allowed": {"$ne": plan_limits["user_hits_allowed"]}}
+                    ]
+                },
+                {
+                    "$set": {
+                        "questions_allowed": plan_limits["questions_allowed"],
+                        "user_hits_allowed": plan_limits["user_hits_allowed"]
+                    }
+                }
+            )
+            if result.modified_count:
+                print(f"Synced subscription limits for {result.modified_count} {plan} clients")
+            synced_count += result.modified_count
+
+        print(f"Subscription sync completed. Updated {synced_count} clients.")
+        return synced_count
+
+    except Exception as e:
+        print(f"Error syncing all client subscriptions: {str(e)}")
+        return 0
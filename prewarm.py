@@ -0,0 +1,108 @@
+import asyncio
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from database import db
+from stats_buffer import get_top_asked_questions
+from translation_service import translation_service
+from tts_cache import tts_cache
+
+load_dotenv()
+
+
+class AnswerPrewarmer:
+    """Precomputes translations and speech for each client's most asked answers ahead of visitor traffic"""
+
+    def __init__(self, top_n: int = None, interval: float = None, languages=None, tts: bool = None):
+        self.top_n = top_n or int(os.getenv("PREWARM_TOP_N", 20))
+        self.interval = interval or float(os.getenv("PREWARM_INTERVAL", 300))
+        self.languages = languages or [lang for lang in os.getenv("PREWARM_LANGUAGES", "te").split(",") if lang]
+        self.tts = tts if tts is not None else os.getenv("PREWARM_TTS", "false").lower() == "true"
+        self._task = None
+
+        self.refreshes = 0
+        self.warmed = 0
+        self.failures = 0
+        self.last_refresh = None
+
+    async def warm_answers(self, answers: list, source_lang: str = "en") -> int:
+        """Warm translations and, if enabled, speech for a client's top answers; returns how many were computed"""
+        translated_before = translation_service.translated
+        spoken = [(answer, source_lang) for answer in answers]
+        for target_lang in self.languages:
+            if target_lang == source_lang:
+                continue
+            # One batched call; answers already in the translation memory are not sent again
+            translations = await translation_service.translate_many(answers, source_lang, target_lang)
+            spoken.extend((translated, target_lang) for translated in translations)
+        computed = translation_service.translated - translated_before
+
+        if self.tts:
+            # Audio goes to the shared on-disk TTS cache that /tts serves from
+            for spoken_text, lang in spoken:
+                if not os.path.exists(tts_cache.path(tts_cache.key(spoken_text, lang))):
+                    await tts_cache.get_or_synthesize(spoken_text, lang)
+                    computed += 1
+        return computed
+
+    async def refresh(self) -> int:
+        """One pass over active clients' top-N answers, computing only what is not already cached"""
+        clients = await db.get_async_collection("clients", read_only=True).find(
+            {"is_active": {"$ne": False}, "subscription_end": {"$gt": datetime.utcnow()}},
+            {"_id": 1}
+        ).to_list(None)
+
+        computed = 0
+        for client in clients:
+            top_questions = await get_top_asked_questions(str(client["_id"]), self.top_n)
+            answers = [question["answer"] for question in top_questions if question.get("answer")]
+            if not answers:
+                continue
+            try:
+                computed += await self.warm_answers(answers)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️ Could not prewarm answers for client {client['_id']}: {e}")
+
+        self.refreshes += 1
+        self.warmed += computed
+        self.last_refresh = datetime.utcnow()
+        if computed:
+            print(f"✅ Prewarmed {computed} answer payloads")
+        return computed
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Error prewarming answers: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "top_n": self.top_n,
+            "languages": self.languages,
+            "tts": self.tts,
+            "refreshes": self.refreshes,
+            "warmed": self.warmed,
+            "failures": self.failures,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None
+        }
+
+
+answer_prewarmer = AnswerPrewarmer()
@@ -0,0 +1,65 @@
+import os
+from bson import ObjectId
+from dotenv import load_dotenv
+from cache import TTLCache
+from database import db
+
+load_dotenv()
+
+# What authenticated endpoints read from current_user; never the password hash
+PRINCIPAL_PROJECTION = {
+    "name": 1,
+    "email": 1,
+    "mobile": 1,
+    "website": 1,
+    "business_type": 1,
+    "location": 1,
+    "pan": 1,
+    "tan": 1,
+    "is_active": 1,
+    "subscription_plan": 1,
+    "subscription_end": 1
+}
+
+PRINCIPAL_COLLECTIONS = {"admin": "admins", "client": "clients"}
+
+
+class PrincipalCache:
+    """Process-local map of user id to a slim profile, so get_current_user rarely queries MongoDB"""
+
+    def __init__(self, ttl: float = None, maxsize: int = None):
+        # Short, since invalidation only reaches this worker; other workers catch up within the TTL
+        self.ttl = ttl or float(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+        self._cache = TTLCache(
+            maxsize=maxsize or int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000)),
+            ttl=self.ttl
+        )
+
+    async def get(self, user_type: str, user_id: str):
+        """Return the profile for a token's user, or None if the user no longer exists"""
+        key = f"{user_type}:{user_id}"
+        principal = self._cache.get(key)
+        if principal is None:
+            principal = await db.get_async_collection(PRINCIPAL_COLLECTIONS[user_type]).find_one(
+                {"_id": ObjectId(user_id)},
+                PRINCIPAL_PROJECTION
+            )
+            if principal is None:
+                return None
+            principal["_id"] = str(principal["_id"])
+            principal["user_type"] = user_type
+            self._cache.set(key, principal, tag=principal["_id"])
+        # Handlers get their own copy, so changes to current_user never leak into the cache
+        return dict(principal)
+
+    def invalidate(self, user_id: str):
+        self._cache.invalidate_tag(str(user_id))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+principal_cache = PrincipalCache()
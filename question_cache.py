@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+import numpy as np
+from bson.binary import Binary
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from database import db
+from matcher import QuestionMatcher
+
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Backstop for writes this worker never hears about, e.g. when questions_version could not be bumped
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", 900))
+
+
+def embedding_to_binary(embedding):
+    """Pack a vector as little-endian float32 bytes for storage in MongoDB"""
+    return Binary(np.asarray(embedding, dtype="<f4").tobytes())
+
+
+def embedding_from_binary(data):
+    return np.frombuffer(data, dtype="<f4")
+
+
+class QuestionEmbeddingCache:
+    """Per-client cache of FAQ question embeddings used by the speechbot query path"""
+
+    def __init__(self, model, model_name=EMBEDDING_MODEL, ttl: float = None):
+        self.model = model
+        self.model_name = model_name
+        self.ttl = ttl or QUESTION_CACHE_TTL
+        # client id -> (matcher, monotonic expiry)
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.exact_misses = 0
+
+    def encode(self, texts):
+        """Encode texts into a normalized float32 matrix"""
+        embeddings = self.model.encode(texts)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def embedding_fields(self, question_text: str) -> dict:
+        """Fields to store on a question document whenever its text is written"""
+        return {
+            "embedding": embedding_to_binary(self.encode([question_text])[0]),
+            "embedding_model": self.model_name
+        }
+
+    def peek(self, client_id: str):
+        """Return the cached entry without loading it, or None on a miss"""
+        with self._lock:
+            return self._live(client_id)
+
+    def get(self, client_id: str, version: int = 0) -> QuestionMatcher:
+        """Return the client's matcher, building it when missing; version is the client's questions_version"""
+        with self._lock:
+            entry = self._live(client_id)
+            if entry is not None:
+                return entry
+            generation = self._generations.get(client_id, 0)
+
+        entry = self._build(client_id, version)
+
+        with self._lock:
+            # Only publish if nothing invalidated the client while we were building
+            if self._generations.get(client_id, 0) == generation:
+                self._entries[client_id] = (entry, time.monotonic() + self.ttl)
+        return entry
+
+    def _live(self, client_id):
+        # Callers hold self._lock
+        cached = self._entries.get(client_id)
+        if cached is None:
+            return None
+        if cached[1] <= time.monotonic():
+            del self._entries[client_id]
+            return None
+        return cached[0]
+
+    def exact_match(self, entry: QuestionMatcher, text: str, threshold: float, min_margin: float):
+        """Look a query up in the client's normalized-text index and count the outcome"""
+        candidate = entry.exact_match(text, threshold, min_margin)
+        with self._lock:
+            if candidate is not None:
+                self.exact_hits += 1
+            else:
+                self.exact_misses += 1
+        return candidate
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.exact_misses
+            return {
+                "cached_clients": len(self._entries),
+                "ann_indexed_clients": sum(1 for entry, _ in self._entries.values() if entry.index is not None),
+                "exact_hits": self.exact_hits,
+                "exact_misses": self.exact_misses,
+                "exact_hit_rate": round(self.exact_hits / lookups, 4) if lookups else 0
+            }
+
+    def invalidate(self, client_id: str):
+        """Drop a client's embeddings after its questions changed"""
+        with self._lock:
+            self._generations[client_id] = self._generations.get(client_id, 0) + 1
+            self._entries.pop(client_id, None)
+
+    def upsert_question(self, client_id: str, question_id: str, question: str, answer: str, embedding,
+                        version: int = None):
+        """Patch a cached client with an added or edited question instead of rebuilding it"""
+        entry = self._bump(client_id)
+        if entry is not None:
+            entry.upsert(question_id, question, answer, embedding_from_binary(embedding))
+            self._advance(entry, version)
+
+    def remove_question(self, client_id: str, question_id: str, version: int = None):
+        """Patch a cached client after one of its questions was deleted"""
+        entry = self._bump(client_id)
+        if entry is not None:
+            entry.remove(question_id)
+            self._advance(entry, version)
+            if entry.needs_rebuild:
+                self.invalidate(client_id)
+
+    def _bump(self, client_id):
+        # Builds that started before this write must not publish, as they may have missed it
+        with self._lock:
+            self._generations[client_id] = self._generations.get(client_id, 0) + 1
+            return self._live(client_id)
+
+    @staticmethod
+    def _advance(entry, version):
+        # A patch brings the matcher to the version this write created only if it had seen every earlier one;
+        # otherwise it keeps its old version and is rebuilt on the next query
+        if version is not None and entry.version == version - 1:
+            entry.version = version
+
+    def _build(self, client_id, version: int = 0):
+        questions_collection = db.get_collection("questions")
+        client_questions = list(questions_collection.find(
+            {"client_id": client_id},
+            {"question": 1, "answer": 1, "embedding": 1, "embedding_model": 1}
+        ))
+
+        if not client_questions:
+            return QuestionMatcher([], [], [], np.zeros((0, 0), dtype=np.float32), version=version)
+
+        # Documents written before embeddings were stored, or by another model, are re-embedded here
+        stale = [q for q in client_questions if q.get("embedding_model") != self.model_name or not q.get("embedding")]
+        if stale:
+            self._store_embeddings(questions_collection, stale)
+
+        question_ids = [str(q["_id"]) for q in client_questions]
+        questions = [q["question"] for q in client_questions]
+        answers = [q["answer"] for q in client_questions]
+        embeddings = np.vstack([embedding_from_binary(q["embedding"]) for q in client_questions])
+
+        # Visitor phrasings that semantic matching resolved before, unless their question was reworded since
+        aliases_collection = db.get_collection("question_aliases")
+        current_text = dict(zip(question_ids, questions))
+        aliases = []
+        stale = []
+        for alias in aliases_collection.find({"client_id": client_id}):
+            if current_text.get(alias["question_id"]) == alias["question_text"]:
+                aliases.append((alias["query"], alias["question_id"], alias["score"], alias["margin"]))
+            else:
+                stale.append(alias["_id"])
+        if stale:
+            aliases_collection.delete_many({"_id": {"$in": stale}})
+
+        return QuestionMatcher(question_ids, questions, answers, embeddings, aliases=aliases, version=version)
+
+    def _store_embeddings(self, questions_collection, documents):
+        """Encode documents in one batch, attach the vectors and persist them"""
+        vectors = self.encode([q["question"] for q in documents])
+        operations = []
+        for document, vector in zip(documents, vectors):
+            document["embedding"] = embedding_to_binary(vector)
+            document["embedding_model"] = self.model_name
+            operations.append(UpdateOne(
+                {"_id": document["_id"], "question": document["question"]},
+                {"$set": {"embedding": document["embedding"], "embedding_model": self.model_name}}
+            ))
+        questions_collection.bulk_write(operations, ordered=False)
+
+    def backfill(self, batch_size: int = 64) -> int:
+        """Embed every stored question that is missing a vector for the current model"""
+        questions_collection = db.get_collection("questions")
+        cursor = questions_collection.find(
+            {"$or": [
+                {"embedding_model": {"$ne": self.model_name}},
+                {"embedding": {"$exists": False}}
+            ]},
+            {"question": 1, "client_id": 1}
+        )
+
+        updated = 0
+        batch = []
+        client_ids = set()
+        for document in cursor:
+            batch.append(document)
+            client_ids.add(document["client_id"])
+            if len(batch) >= batch_size:
+                self._store_embeddings(questions_collection, batch)
+                updated += len(batch)
+                batch = []
+        if batch:
+            self._store_embeddings(questions_collection, batch)
+            updated += len(batch)
+
+        for client_id in client_ids:
+            self.invalidate(client_id)
+        return updated
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+from bson import ObjectId
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from database import db
+
+load_dotenv()
+
+
+def settled_hits_used(client: dict) -> int:
+    """Hits actually served, leaving out tokens reserved by API workers but not yet handed out"""
+    return max(0, client.get("user_hits_used", 0) - client.get("user_hits_reserved", 0))
+
+
+class QuotaService:
+    """Atomic check-and-consume of client user hits"""
+
+    def __init__(self, bucket_size: int = None):
+        # With a bucket size above 1, hits are reserved from MongoDB in blocks and handed out locally
+        self.bucket_size = bucket_size or int(os.getenv("QUOTA_BUCKET_SIZE", 1))
+        # client id -> [tokens left, tokens reserved with the block, quota_epoch the block was taken under]
+        self._buckets = {}
+        self._lock = threading.Lock()
+        # client id -> asyncio.Lock held while a block is reserved for that client
+        self._reserve_locks = {}
+
+        self.reservations = 0
+        self.local_grants = 0
+        self.rejections = 0
+        self.stale_releases = 0
+
+    async def consume(self, client_id) -> bool:
+        """Consume one user hit, returning False when the client's plan is exhausted"""
+        key = str(client_id)
+        granted, used_up = self._take(key)
+        if not granted:
+            # One reservation per client at a time: concurrent requests wait for that block and take from it,
+            # instead of reserving blocks of their own that would overwrite each other in _buckets
+            async with self._reserve_locks.setdefault(key, asyncio.Lock()):
+                granted, used_up = self._take(key)
+                if not granted:
+                    granted, epoch = await self._reserve(client_id, self.bucket_size)
+                    if not granted:
+                        with self._lock:
+                            self.rejections += 1
+                        return False
+                    if granted > 1:
+                        with self._lock:
+                            self._buckets[key] = [granted - 1, granted - 1, epoch]
+                    return True
+
+        if used_up is not None:
+            # The block is used up, so its hits stop counting as reserved
+            try:
+                await self._settle(client_id, used_up[2], {"user_hits_reserved": -used_up[1]})
+            except Exception as e:
+                print(f"⚠️ Could not settle reserved hits for client {client_id}: {e}")
+        return True
+
+    def _take(self, key: str):
+        """Hand out a locally reserved hit, returning (granted, the bucket if this used it up)"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return False, None
+            bucket[0] -= 1
+            self.local_grants += 1
+            if bucket[0] > 0:
+                return True, None
+            del self._buckets[key]
+            return True, bucket
+
+    async def _reserve(self, client_id, count: int):
+        """Reserve up to count hits, returning (granted, quota_epoch)"""
+        clients_collection = db.get_async_collection("clients")
+
+        # Near the end of a plan a full bucket no longer fits, so fall back to a single hit
+        for amount in ([count, 1] if count > 1 else [1]):
+            updated = await clients_collection.find_one_and_update(
+                {
+                    "_id": ObjectId(client_id),
+                    "$expr": {
+                        "$lte": [
+                            {"$add": [{"$ifNull": ["$user_hits_used", 0]}, amount]},
+                            {"$ifNull": ["$user_hits_allowed", 0]}
+                        ]
+                    }
+                },
+                # Tokens kept for later requests are tracked separately, so dashboards can leave them out
+                {"$inc": {"user_hits_used": amount, "user_hits_reserved": amount - 1}},
+                projection={"quota_epoch": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if updated is not None:
+                with self._lock:
+                    self.reservations += 1
+                return amount, updated.get("quota_epoch")
+        return 0, None
+
+    async def _settle(self, client_id, epoch, increments: dict):
+        # A reset since the block was reserved bumps quota_epoch; the old block must not touch the new counters
+        result = await db.get_async_collection("clients").update_one(
+            {"_id": ObjectId(client_id), "quota_epoch": epoch},
+            {"$inc": increments}
+        )
+        if result.matched_count == 0:
+            with self._lock:
+                self.stale_releases += 1
+
+    async def release(self, client_id):
+        """Hand a client's unused reserved hits back to MongoDB"""
+        with self._lock:
+            bucket = self._buckets.pop(str(client_id), None)
+        if bucket is not None:
+            unused, reserved, epoch = bucket
+            await self._settle(client_id, epoch, {"user_hits_used": -unused, "user_hits_reserved": -reserved})
+
+    def discard(self, client_id):
+        """Drop a client's reserved hits without writing back, e.g. after the client was deleted"""
+        with self._lock:
+            self._buckets.pop(str(client_id), None)
+
+    async def release_all(self):
+        with self._lock:
+            client_ids = list(self._buckets.keys())
+        for client_id in client_ids:
+            try:
+                await self.release(client_id)
+            except Exception as e:
+                print(f"❌ Error releasing reserved hits for client {client_id}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bucket_size": self.bucket_size,
+                "clients_with_reserved_hits": len(self._buckets),
+                "reserved_hits": sum(bucket[0] for bucket in self._buckets.values()),
+                "reservations": self.reservations,
+                "local_grants": self.local_grants,
+                "rejections": self.rejections,
+                "stale_releases": self.stale_releases
+            }
+
+
+quota_service = QuotaService()
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import threading
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from database import db
+
+load_dotenv()
+
+
+class QuestionStatsBuffer:
+    """Coalesces question_stats counter increments and writes them as one bulk upsert"""
+
+    def __init__(self, flush_interval: float = None, max_pending: int = None):
+        self.flush_interval = flush_interval or float(os.getenv("QUESTION_STATS_FLUSH_INTERVAL", 2))
+        self.max_pending = max_pending or int(os.getenv("QUESTION_STATS_MAX_PENDING", 5000))
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+
+        self.recorded = 0
+        self.flushes = 0
+        self.documents_written = 0
+        self.failed_flushes = 0
+
+    def record_answered(self, client_id: str, website: str, question_id: str, question_text: str):
+        """Count a visitor question that matched a stored question"""
+        self._add(
+            (client_id, "question_id", question_id),
+            {"client_id": client_id, "question_id": question_id},
+            {"client_id": client_id, "website": website, "question_id": question_id, "question_text": question_text}
+        )
+
+    def record_unanswered(self, client_id: str, website: str, question_text: str):
+        """Count a visitor question with no stored answer"""
+        self._add(
+            (client_id, "question_text", question_text),
+            {"client_id": client_id, "question_text": question_text, "question_id": {"$exists": False}},
+            {"client_id": client_id, "website": website, "question_text": question_text}
+        )
+
+    def _add(self, key, filter_doc, insert_doc, count: int = 1, wake: bool = True):
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = {"filter": filter_doc, "insert": insert_doc, "count": 0}
+            entry["count"] += count
+            self.recorded += count
+            pending = len(self._pending)
+
+        # Many distinct questions pending: flush early instead of waiting for the timer.
+        # asyncio.Event is not thread-safe, so the wakeup is always scheduled on the loop
+        if wake and pending >= self.max_pending and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def flush(self) -> int:
+        """Write all pending increments, returning the number of documents upserted or updated"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            now = datetime.utcnow()
+            operations = [
+                UpdateOne(
+                    entry["filter"],
+                    {
+                        "$setOnInsert": {**entry["insert"], "created_at": now},
+                        "$inc": {"count": entry["count"]}
+                    },
+                    upsert=True
+                )
+                for entry in pending.values()
+            ]
+
+            try:
+                db.get_collection("question_stats").bulk_write(operations, ordered=False)
+            except Exception as e:
+                # Put the counts back so the next flush retries them; no early wakeup, the timer paces retries
+                for key, entry in pending.items():
+                    self._add(key, entry["filter"], entry["insert"], entry["count"], wake=False)
+                    self.recorded -= entry["count"]
+                self.failed_flushes += 1
+                print(f"❌ Error flushing question stats: {e}")
+                return 0
+
+            self.flushes += 1
+            self.documents_written += len(operations)
+            return len(operations)
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await loop.run_in_executor(None, self.flush)
+
+    async def stop(self):
+        """Stop the periodic flush and drain whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending_keys": len(self._pending),
+                "pending_increments": sum(entry["count"] for entry in self._pending.values()),
+                "recorded": self.recorded,
+                "flushes": self.flushes,
+                "documents_written": self.documents_written,
+                "failed_flushes": self.failed_flushes,
+                "flush_interval_seconds": self.flush_interval
+            }
+
+
+async def get_top_asked_questions(client_id: str, limit: int = None) -> list:
+    """A client's stored questions that visitors have asked, most asked first, with asked_count set"""
+    question_stats_collection = db.get_async_collection("question_stats", read_only=True)
+    questions_collection = db.get_async_collection("questions", read_only=True)
+
+    cursor = question_stats_collection.find(
+        {"client_id": client_id, "question_id": {"$exists": True}},
+        {"question_id": 1, "count": 1}
+    ).sort("count", -1)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    counts = {}
+    for stat in await cursor.to_list(None):
+        # Sorted by count, so the first row for a question carries its highest count
+        counts.setdefault(stat["question_id"], stat.get("count", 0))
+    if not counts:
+        return []
+
+    questions = await questions_collection.find(
+        {"_id": {"$in": [ObjectId(question_id) for question_id in counts]}},
+        {"embedding": 0}
+    ).to_list(None)
+    for question in questions:
+        question["_id"] = str(question["_id"])
+        question["client_id"] = str(question["client_id"])
+        question["asked_count"] = counts.get(question["_id"], 0)
+
+    return sorted(questions, key=lambda x: x.get("asked_count", 0), reverse=True)
+
+
+question_stats_buffer = QuestionStatsBuffer()
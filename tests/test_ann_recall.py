@@ -0,0 +1,118 @@
+"""Recall@1 of the ANN indexes against brute-force scoring, on a fixed-seed clustered corpus.
+
+    pip install pytest
+    python -m pytest tests
+
+HNSW cases are skipped when hnswlib is not installed. Larger sizes and latency are in
+benchmarks/bench_ann.py.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ann_index
+from matcher import QuestionMatcher
+
+DIMENSION = 384
+QUESTIONS = 3000
+QUERIES = 200
+MIN_RECALL = 0.95
+
+BACKENDS = [
+    "ivf",
+    pytest.param("hnsw", marks=pytest.mark.skipif(ann_index.hnswlib is None, reason="hnswlib not installed"))
+]
+
+
+def unit(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def clustered_vectors(count, rng, topics=60):
+    # Topical FAQ entries: many questions close to a handful of directions
+    centers = rng.standard_normal((topics, DIMENSION))
+    return unit(centers[rng.integers(0, topics, count)] + 0.6 * rng.standard_normal((count, DIMENSION)))
+
+
+def recall_at_1(matcher, queries):
+    index, matcher.index = matcher.index, None
+    exact = [matcher.top_k(query, 1)[0].index for query in queries]
+    matcher.index = index
+    approximate = [matcher.top_k(query, 1)[0].index for query in queries]
+    return np.mean(np.array(exact) == np.array(approximate))
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(1234)
+    embeddings = clustered_vectors(QUESTIONS, rng)
+    picks = rng.integers(0, QUESTIONS, QUERIES)
+    queries = unit(embeddings[picks] + 0.03 * rng.standard_normal((QUERIES, DIMENSION)))
+    return rng, embeddings, queries
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_recall_at_1(monkeypatch, corpus, backend):
+    _, embeddings, queries = corpus
+    monkeypatch.setattr(ann_index, "ANN_BACKEND", backend)
+    ids = [str(i) for i in range(QUESTIONS)]
+    matcher = QuestionMatcher(ids, ids, ids, embeddings)
+
+    assert matcher.index is not None
+    assert recall_at_1(matcher, queries) >= MIN_RECALL
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_recall_at_1_after_updates(monkeypatch, corpus, backend):
+    rng, embeddings, queries = corpus
+    monkeypatch.setattr(ann_index, "ANN_BACKEND", backend)
+    ids = [str(i) for i in range(QUESTIONS)]
+    # A copy, since edits write into the matcher's matrix and the old vectors are queried below
+    matcher = QuestionMatcher(ids, ids, ids, embeddings.copy())
+
+    # 10% new questions, then edits and deletes interleaved, so edits land while vacant slots exist.
+    # Some edited questions are deleted afterwards, and their old vectors are queried too
+    for i in range(QUESTIONS // 10):
+        matcher.upsert(f"new-{i}", "", "", clustered_vectors(1, rng)[0])
+    changed = rng.choice(QUESTIONS, QUESTIONS // 10, replace=False)
+    deleted = set()
+    old_vectors = []
+    for position, question_id in enumerate(changed):
+        if position % 2:
+            old_vectors.append(embeddings[question_id])
+            matcher.upsert(str(question_id), "", "", clustered_vectors(1, rng)[0])
+            if position % 3 == 0:
+                matcher.remove(str(question_id))
+                deleted.add(str(question_id))
+        else:
+            matcher.remove(str(question_id))
+            deleted.add(str(question_id))
+
+    assert matcher.index is not None
+    assert recall_at_1(matcher, queries) >= MIN_RECALL
+    for query in list(queries) + old_vectors:
+        assert not deleted & {candidate.question_id for candidate in matcher.top_k(query, 3)}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_edited_then_deleted_questions_are_not_matched(monkeypatch, corpus, backend):
+    rng, embeddings, _ = corpus
+    monkeypatch.setattr(ann_index, "ANN_BACKEND", backend)
+    ids = [str(i) for i in range(QUESTIONS)]
+    # A copy, since edits write into the matcher's matrix and the old vectors are queried below
+    matcher = QuestionMatcher(ids, ids, ids, embeddings.copy())
+
+    # Vacant slots exist when these questions are edited; each is then deleted
+    matcher.remove("3")
+    edited = [str(i) for i in range(10, 40)]
+    for question_id in edited:
+        matcher.upsert(question_id, "", "", clustered_vectors(1, rng)[0])
+    for question_id in edited:
+        matcher.remove(question_id)
+
+    for question_id in edited:
+        result = matcher.match(embeddings[int(question_id)])
+        assert all(candidate.question_id not in edited for candidate in result.candidates)
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import inspect
+import os
+from datetime import datetime
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from cache import TTLCache
+from database import db
+
+load_dotenv()
+
+
+class GoogleTranslator:
+    """One googletrans client for the whole process, so its HTTP connections are kept alive"""
+
+    name = "google"
+
+    def __init__(self):
+        self._translator = None
+
+    async def translate(self, texts: list, source_lang: str, target_lang: str) -> list:
+        if self._translator is None:
+            from googletrans import Translator
+
+            self._translator = Translator()
+
+        # googletrans 4.x is async; older releases block, so they run in a thread
+        if inspect.iscoroutinefunction(self._translator.translate):
+            result = await self._translator.translate(texts, src=source_lang, dest=target_lang)
+        else:
+            result = await asyncio.to_thread(self._translator.translate, texts, src=source_lang, dest=target_lang)
+        if not isinstance(result, list):
+            result = [result]
+        return [translation.text for translation in result]
+
+    async def close(self):
+        client = getattr(self._translator, "client", None)
+        if client is not None and hasattr(client, "aclose"):
+            await client.aclose()
+
+
+class StubTranslator:
+    """Offline translator for development and tests: tags the text with the target language"""
+
+    name = "stub"
+
+    async def translate(self, texts: list, source_lang: str, target_lang: str) -> list:
+        return [f"[{target_lang}] {text}" for text in texts]
+
+    async def close(self):
+        pass
+
+
+TRANSLATORS = {translator.name: translator for translator in (GoogleTranslator, StubTranslator)}
+
+
+class TranslationService:
+    """Translation memory: in-process LRU in front of the MongoDB translations collection, in front of the translator"""
+
+    def __init__(self, translator=None):
+        self.translator = translator or TRANSLATORS[os.getenv("TRANSLATOR_BACKEND", "google")]()
+        self._memory = TTLCache(
+            maxsize=int(os.getenv("TRANSLATION_CACHE_SIZE", 10000)),
+            ttl=float(os.getenv("TRANSLATION_CACHE_TTL", 86400))
+        )
+
+        self.store_hits = 0
+        self.translated = 0
+        self.failed_writes = 0
+
+    @staticmethod
+    def key(text: str, source_lang: str, target_lang: str) -> str:
+        return f"{source_lang}:{target_lang}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        return (await self.translate_many([text], source_lang, target_lang))[0]
+
+    async def translate_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        """Translate texts in order, calling the translator once for everything not already remembered"""
+        if source_lang == target_lang:
+            return list(texts)
+
+        keys = [self.key(text, source_lang, target_lang) for text in texts]
+        found = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if not text or key in found or key in missing:
+                continue
+            translated = self._memory.get(key)
+            if translated is None:
+                missing[key] = text
+            else:
+                found[key] = translated
+
+        if missing:
+            translations_collection = db.get_async_collection("translations")
+            stored = await translations_collection.find(
+                {"_id": {"$in": list(missing)}},
+                {"translated_text": 1}
+            ).to_list(None)
+            for document in stored:
+                found[document["_id"]] = document["translated_text"]
+                self._memory.set(document["_id"], document["translated_text"])
+                del missing[document["_id"]]
+            self.store_hits += len(stored)
+
+        if missing:
+            translated = await self.translator.translate(list(missing.values()), source_lang, target_lang)
+            self.translated += len(missing)
+            now = datetime.utcnow()
+            operations = []
+            for (key, text), translated_text in zip(missing.items(), translated):
+                found[key] = translated_text
+                self._memory.set(key, translated_text)
+                operations.append(UpdateOne(
+                    {"_id": key},
+                    {"$setOnInsert": {
+                        "source_lang": source_lang,
+                        "target_lang": target_lang,
+                        "text": text,
+                        "translated_text": translated_text,
+                        "created_at": now
+                    }},
+                    upsert=True
+                ))
+            try:
+                await translations_collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                # The translation is still returned; it is only not remembered across restarts
+                self.failed_writes += 1
+                print(f"⚠️ Could not store translations: {e}")
+
+        return [found.get(key, text) if text else text for key, text in zip(keys, texts)]
+
+    def stats(self) -> dict:
+        return {
+            "translator": self.translator.name,
+            "memory": self._memory.stats(),
+            "store_hits": self.store_hits,
+            "translated": self.translated,
+            "failed_writes": self.failed_writes
+        }
+
+    async def close(self):
+        await self.translator.close()
+
+
+translation_service = TranslationService()
@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", 3))
+TTS_STREAM_MIN_CHARS = int(os.getenv("TTS_STREAM_MIN_CHARS", 40))
+
+# Sentence ends in English and Telugu text, including the danda
+SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
+
+
+def split_sentences(text: str, min_chars: int = TTS_STREAM_MIN_CHARS) -> list:
+    """Split text at sentence boundaries, merging fragments shorter than min_chars into the next one"""
+    chunks = []
+    pending = ""
+    for sentence in SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {sentence}".strip() if pending else sentence.strip()
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks and len(pending) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+def tts_lang_code(lang: str) -> str:
+    return "te" if lang == "te" else "en"
+
+
+def synthesize_speech(text: str, lang: str) -> bytes:
+    """Blocking gTTS call returning MP3 bytes; run it in an executor"""
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=tts_lang_code(lang), slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+class TTSCache:
+    """Content-addressed MP3 cache on local disk, bounded by total size with least-recently-used eviction"""
+
+    def __init__(self, directory: str = None, max_bytes: int = None, workers: int = None):
+        self.directory = directory or os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tva_tts_cache"))
+        self.max_bytes = max_bytes or int(os.getenv("TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+        # gTTS is a blocking network call, so synthesis runs on its own small pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.getenv("TTS_WORKERS", 4)),
+            thread_name_prefix="tts"
+        )
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._bytes = None
+
+        self.hits = 0
+        self.misses = 0
+        self.synthesized = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text: str, lang: str) -> str:
+        return hashlib.sha256(f"{tts_lang_code(lang)}\0{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def get(self, key: str):
+        """Path of the cached MP3 for key, or None on a miss"""
+        path = self.path(key)
+        try:
+            # Bump the modification time so eviction treats this file as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key: str, audio: bytes) -> str:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent readers and other workers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_size()
+            else:
+                self._bytes += len(audio)
+            over_limit = self._bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+        return path
+
+    async def get_or_synthesize(self, text: str, lang: str):
+        """Return (key, path) for text, synthesizing it off the event loop on a miss"""
+        key = self.key(text, lang)
+        path = self.get(key)
+        if path is not None:
+            return key, path
+
+        # Concurrent requests for the same audio share one synthesis
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is None:
+            future = loop.run_in_executor(self._executor, self._synthesize, key, text, lang)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return key, await asyncio.shield(future)
+
+    async def stream(self, text: str, lang: str, concurrency: int = None):
+        """Yield MP3 audio sentence by sentence, in order, synthesizing up to `concurrency` chunks at a time"""
+        semaphore = asyncio.Semaphore(concurrency or TTS_STREAM_CONCURRENCY)
+
+        async def chunk_path(chunk):
+            async with semaphore:
+                _, path = await self.get_or_synthesize(chunk, lang)
+                return path
+
+        tasks = [asyncio.ensure_future(chunk_path(chunk)) for chunk in split_sentences(text)]
+        try:
+            for task in tasks:
+                path = await task
+                # MP3 frames concatenate cleanly, so each chunk is sent as soon as it and its predecessors are ready
+                yield await asyncio.to_thread(self._read, path)
+        finally:
+            # The visitor went away or a chunk failed: stop synthesizing the rest
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _read(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _synthesize(self, key, text, lang):
+        audio = synthesize_speech(text, lang)
+        with self._lock:
+            self.synthesized += 1
+        return self.put(key, audio)
+
+    def _files(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                for file in os.scandir(entry.path):
+                    if file.name.endswith(".mp3"):
+                        yield file
+
+    def _scan_size(self) -> int:
+        return sum(file.stat().st_size for file in self._files())
+
+    def _evict(self):
+        """Delete least recently used files until the cache is back under 90% of its limit"""
+        files = []
+        for file in self._files():
+            stat = file.stat()
+            files.append((stat.st_mtime, stat.st_size, file.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._bytes = total
+            self.evictions += evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "synthesized": self.synthesized,
+                "evictions": self.evictions,
+                "inflight": len(self._inflight)
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+tts_cache = TTSCache()